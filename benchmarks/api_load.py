@@ -0,0 +1,150 @@
+"""
+Load test of the execution API (src/api.py) against localhost.
+
+Starts an API server in-process on a free port (or uses --url) and drives it
+with concurrent clients through four scenarios, checking each against the
+published targets below:
+
+- throughput: distinct trivial Python snippets at --concurrency; requests
+  per second and p95 latency.
+- streaming: a snippet that prints, then sleeps; how long until its first
+  stdout record arrives.
+- dedup: identical slow snippets submitted at once; how many jobs executed.
+- backpressure: more slow snippets than workers and queue slots; how fast
+  the requests that don't fit are turned away with 503.
+
+Exits non-zero if any target is missed.
+
+Usage:
+    python benchmarks/api_load.py
+    python benchmarks/api_load.py --url http://localhost:8504 --requests 500
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+# name: (limit, True if higher is better)
+TARGETS = {
+    "throughput_rps": (50.0, True),
+    "p95_latency_ms": (250.0, False),
+    "first_stdout_ms": (500.0, False),
+    "dedup_executions": (1, False),
+    "rejection_p95_ms": (250.0, False),  # well under the 1 s jobs it waits behind
+}
+SLOW_SNIPPET = "import time\ntime.sleep({seconds})\nprint('done')\n"
+
+
+def _run(client: httpx.Client, url: str, code: str) -> tuple[int, list[dict], float]:
+    """Posts a streamed run; returns the status, records and latency in seconds."""
+    start = time.perf_counter()
+    with client.stream(
+        "POST", f"{url}/run", json={"engine": "Python", "code": code}
+    ) as response:
+        records = [json.loads(line) for line in response.iter_lines() if line]
+    return response.status_code, records, time.perf_counter() - start
+
+
+def _p95(values: list[float]) -> float:
+    return statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+
+
+def throughput(url: str, requests: int, concurrency: int) -> dict[str, float]:
+    with httpx.Client(timeout=60) as client, ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        results = list(
+            pool.map(lambda i: _run(client, url, f"print({i})"), range(requests))
+        )
+        elapsed = time.perf_counter() - start
+    failed = [r for r in results if r[0] != 200 or not r[1][-1].get("ok")]
+    if failed:
+        raise RuntimeError(f"{len(failed)} throughput runs failed: {failed[0]}")
+    return {
+        "throughput_rps": requests / elapsed,
+        "p95_latency_ms": _p95([r[2] for r in results]) * 1e3,
+    }
+
+
+def streaming(url: str) -> dict[str, float]:
+    code = "import time\nprint('first', flush=True)\ntime.sleep(1)\nprint('last')\n"
+    with httpx.Client(timeout=60) as client:
+        start = time.perf_counter()
+        with client.stream(
+            "POST", f"{url}/run", json={"engine": "Python", "code": code}
+        ) as response:
+            for line in response.iter_lines():
+                if line and "stdout" in json.loads(line):
+                    return {"first_stdout_ms": (time.perf_counter() - start) * 1e3}
+    raise RuntimeError("Streamed run printed nothing")
+
+
+def dedup(url: str, concurrency: int) -> dict[str, float]:
+    code = SLOW_SNIPPET.format(seconds=0.5)
+    with httpx.Client(timeout=60) as client, ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: _run(client, url, code), range(concurrency)))
+    return {"dedup_executions": len({r[1][0]["job"] for r in results})}
+
+
+def backpressure(url: str) -> dict[str, float]:
+    with httpx.Client(timeout=60) as client:
+        stats = client.get(f"{url}/health").json()
+    capacity = stats["workers"] + stats["queue_size"]
+    # Distinct comments keep the requests from being deduplicated.
+    codes = [SLOW_SNIPPET.format(seconds=1) + f"# {i}\n" for i in range(capacity * 2)]
+    with httpx.Client(timeout=60) as client, ThreadPoolExecutor(len(codes)) as pool:
+        results = list(pool.map(lambda code: _run(client, url, code), codes))
+    rejected = [r[2] for r in results if r[0] == 503]
+    if not rejected:
+        raise RuntimeError("No request was turned away")
+    return {"rejection_p95_ms": _p95(rejected) * 1e3}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="API to test (default: start one in-process)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        from api import create_api_server
+
+        server = create_api_server(port=0)
+        server.start()
+        url = server.url
+    url = url.rstrip("/")
+
+    # Warm up the engine and the snippet compiler before measuring.
+    with httpx.Client(timeout=60) as client:
+        _run(client, url, "print('warm-up')")
+
+    results = {
+        **throughput(url, args.requests, args.concurrency),
+        **streaming(url),
+        **dedup(url, args.concurrency),
+        **backpressure(url),
+    }
+
+    failed = False
+    print(f"{'metric':<18} {'value':>10} {'target':>10}")
+    for name, value in results.items():
+        limit, higher_is_better = TARGETS[name]
+        ok = value >= limit if higher_is_better else value <= limit
+        failed |= not ok
+        bound = f"{'>=' if higher_is_better else '<='} {limit:g}"
+        print(f"{name:<18} {value:>10.1f} {bound:>10}  {'ok' if ok else 'MISSED'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
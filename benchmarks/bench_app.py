@@ -0,0 +1,71 @@
+"""
+Instrumented entry point for the rerun-latency benchmark.
+
+Executes `src/main.py` without its `__main__` guard, wraps the functions the
+benchmark measures, and calls `main()`. Timings of the current rerun are left
+in `st.session_state["bench_timings"]` (milliseconds).
+"""
+
+import runpy
+import time
+from pathlib import Path
+
+import streamlit as st
+
+MAIN = Path(__file__).resolve().parent.parent / "src" / "main.py"
+
+
+def _timed(name: str, func, timings: dict):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1e3
+
+    return wrapper
+
+
+class _TimedEngine:
+    """Delegates to an engine, timing its run() calls."""
+
+    def __init__(self, engine, timings: dict):
+        self._engine = engine
+        self.run = _timed("engine_run", engine.run, timings)
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+
+timings: dict[str, float] = {}
+# run_path returns a copy of the module globals; patch the live namespace.
+app = runpy.run_path(str(MAIN), run_name="bench_main")["main"].__globals__
+
+render_editor = app["code_editor"]
+
+
+def code_editor(code, **kwargs):
+    # Render the real component, then report the code as if the user had
+    # pressed Run: AppTest can't drive the editor's frontend.
+    render_editor(code, **kwargs)
+    return {"id": "bench", "type": "submit", "text": code}
+
+
+get_settings = app["get_settings"]
+
+
+def timed_get_settings():
+    settings = get_settings()
+    if settings is not None:
+        engine, *rest = settings
+        settings = (_TimedEngine(engine, timings), *rest)
+    return settings
+
+
+app["code_editor"] = _timed("editor_render", code_editor, timings)
+app["get_code"] = _timed("get_code", app["get_code"], timings)
+app["get_settings"] = _timed("get_settings", timed_get_settings, timings)
+
+total = _timed("total", app["main"], timings)
+total()
+st.session_state["bench_timings"] = timings
@@ -0,0 +1,109 @@
+"""
+Overhead of execution budgets on ordinary snippets.
+
+Runs a few representative snippets in-process with no budget, with the
+default budget (wall time and output limits) and with a line-event budget
+added, and reports the median time of each relative to no budget. Exits
+non-zero if the default budget costs more than --threshold.
+
+The line-event budget traces every line of the snippet's own code and
+costs several times the snippet's run time, far above the threshold. It
+is reported for reference only, which is why it is off by default
+(APP_BUDGET_LINE_EVENTS).
+
+Usage:
+    python benchmarks/budget_overhead.py
+    python benchmarks/budget_overhead.py --repeat 50 --threshold 0.05
+"""
+
+import argparse
+import contextlib
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from engines.backends import IN_PROCESS_BACKEND  # noqa: E402
+from engines.budgets import Budget, enforce_budget, limit_output  # noqa: E402
+from engines.console import ConsoleLog  # noqa: E402
+
+SNIPPETS = {
+    "arithmetic": "total = 0\nfor i in range(200_000):\n    total += i * i\n",
+    "functions": (
+        "def fib(n):\n    return n if n < 2 else fib(n - 1) + fib(n - 2)\nfib(20)\n"
+    ),
+    "printing": "for i in range(20_000):\n    print(i, 'line of output')\n",
+    "library": "sorted(str(i) for i in range(100_000))\n",
+}
+BUDGETS = {
+    "default": Budget(wall_time=30.0, output_chars=50_000_000),
+    "line events": Budget(
+        wall_time=30.0, output_chars=50_000_000, line_events=100_000_000
+    ),
+}
+
+
+def _time_run(code, budget: Budget | None) -> float:
+    log = ConsoleLog()
+    guard = enforce_budget(budget) if budget else contextlib.nullcontext()
+    start = time.perf_counter()
+    with guard:
+        limit_output(log)
+        error = IN_PROCESS_BACKEND.execute_in({}, code, log)
+    elapsed = time.perf_counter() - start
+    if error is not None:
+        raise error
+    return elapsed
+
+
+def bench(repeat: int) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, source in SNIPPETS.items():
+        code = compile(source, "<string>", "exec")
+        configs = {"none": None, **BUDGETS}
+        times = {config: [] for config in configs}
+        for _ in range(repeat):
+            # Interleave configurations so drift affects them equally.
+            for config, budget in configs.items():
+                times[config].append(_time_run(code, budget))
+        results[name] = {c: statistics.median(t) * 1e3 for c, t in times.items()}
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="maximum overhead of the default budget (fraction, default 0.05)",
+    )
+    args = parser.parse_args()
+
+    results = bench(args.repeat)
+    print(f"{'snippet':<12} {'none ms':>9} " + " ".join(f"{b:>14}" for b in BUDGETS))
+    failed = False
+    for name, times in results.items():
+        base = times["none"]
+        cells = []
+        for config in BUDGETS:
+            overhead = times[config] / base - 1
+            cells.append(f"{times[config]:8.2f} {overhead:+5.1%}")
+        print(f"{name:<12} {base:9.2f} " + " ".join(f"{c:>14}" for c in cells))
+        failed |= times["default"] / base - 1 > args.threshold
+
+    print(
+        f"Threshold {args.threshold:.0%} applies to the default budget; "
+        "line events are opt-in and not held to it."
+    )
+    if failed:
+        print(f"Default budget overhead exceeds {args.threshold:.0%}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Stress test of per-run console capture under concurrency.
+
+Runs many snippets at once in-process, each on its own thread, as
+concurrent sessions would. Every snippet prints lines tagged with its run
+id from its own thread, to stderr, and from threads it starts itself. The
+test then checks that each run captured exactly its own lines and that
+nothing leaked to the server's console.
+
+Exits non-zero if any run captured a foreign, missing or duplicated line.
+
+Usage:
+    python benchmarks/console_capture.py
+    python benchmarks/console_capture.py --runs 256 --lines 2000
+"""
+
+import argparse
+import io
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from engines.backends import IN_PROCESS_BACKEND  # noqa: E402
+from engines.console import ConsoleLog, install_stream_routers  # noqa: E402
+
+SNIPPET = """\
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+for i in range(LINES):
+    print(RUN, 'main', i)
+    if i % 100 == 0:
+        print(RUN, 'stderr', i, file=sys.stderr)
+
+def spawned(i):
+    print(RUN, 'thread', i)
+
+with ThreadPoolExecutor(4) as pool:
+    list(pool.map(spawned, range(THREAD_LINES)))
+"""
+THREAD_LINES = 50
+
+
+def expected_lines(run: int, lines: int) -> Counter:
+    expected = Counter(f"{run} main {i}" for i in range(lines))
+    expected.update(f"{run} stderr {i}" for i in range(0, lines, 100))
+    expected.update(f"{run} thread {i}" for i in range(THREAD_LINES))
+    return expected
+
+
+def stress(runs: int, lines: int) -> tuple[list[str], float]:
+    """Runs the snippets concurrently; returns the problems found and seconds."""
+    code = compile(SNIPPET, "<string>", "exec")
+    logs = [ConsoleLog() for _ in range(runs)]
+    errors: list[BaseException | None] = [None] * runs
+    barrier = threading.Barrier(runs)
+
+    def run(i: int) -> None:
+        namespace = {"RUN": i, "LINES": lines, "THREAD_LINES": THREAD_LINES}
+        barrier.wait()
+        errors[i] = IN_PROCESS_BACKEND.execute_in(namespace, code, logs[i])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(runs) as pool:
+        list(pool.map(run, range(runs)))
+    elapsed = time.perf_counter() - start
+
+    problems = []
+    for i, (log, error) in enumerate(zip(logs, errors)):
+        if error is not None:
+            problems.append(f"run {i} failed: {error!r}")
+            continue
+        got = Counter(log.getvalue().splitlines())
+        expected = expected_lines(i, lines)
+        if got != expected:
+            foreign = sum((got - expected).values())
+            missing = sum((expected - got).values())
+            problems.append(f"run {i}: {foreign} foreign, {missing} missing lines")
+    return problems, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=64, help="concurrent runs")
+    parser.add_argument("--lines", type=int, default=1000, help="lines per run")
+    args = parser.parse_args()
+
+    # Anything the routers don't capture falls through to this stream.
+    leaked = io.StringIO()
+    sys.stdout = sys.stderr = leaked
+    install_stream_routers()
+    try:
+        problems, elapsed = stress(args.runs, args.lines)
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    if leaked.getvalue():
+        problems.append(
+            f"{len(leaked.getvalue().splitlines())} lines leaked to the console"
+        )
+
+    total = sum(expected_lines(0, args.lines).values()) * args.runs
+    print(
+        f"{args.runs} concurrent runs, {total:,} lines in {elapsed:.2f}s "
+        f"({total / elapsed:,.0f} lines/s)"
+    )
+    for problem in problems[:20]:
+        print(problem)
+    if problems:
+        print(f"{len(problems)} problems")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
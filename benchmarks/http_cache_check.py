@@ -0,0 +1,290 @@
+"""
+Conformance checks of the shared HTTP clients (src/engines/http_client.py)
+against a local HTTP server.
+
+Each check builds a client on a fresh HTTPCache in a temporary directory,
+exactly as get_http_client() does, and counts what reaches the server:
+
+- freshness: fresh responses are served from the cache, stale ones aren't.
+- revalidation: stale responses with an ETag are revalidated with
+  If-None-Match, and a 304 is answered with the stored body.
+- vary: a request whose Vary headers differ is a miss.
+- no-store: neither responses nor requests marked no-store are cached, nor
+  private responses or requests with credentials.
+- invalidation: an unsafe method invalidates the stored response.
+- eviction: the directory stays within its size; the least recently used
+  entries go first.
+- host limit: no more than `per_host` requests reach one host at a time,
+  for both the sync and the async client, across event loops.
+- host slots: a request waiting for a busy host times out with
+  httpx.PoolTimeout, and responses left open free their slot when the run
+  ends or when they are garbage-collected.
+
+Exits non-zero if any check fails.
+
+Usage:
+    python benchmarks/http_cache_check.py
+"""
+
+import asyncio
+import gc
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from engines.http_client import (  # noqa: E402
+    AsyncHostLimitedTransport,
+    CachingTransport,
+    HostLimitedTransport,
+    HTTPCache,
+    release_host_slots,
+)
+
+SLOW_SECONDS = 0.2
+BLOB_BYTES = 6 * 1024
+
+
+class _Origin(ThreadingHTTPServer):
+    """Test server counting the requests and 304s it answers per path."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.hits: Counter[str] = Counter()
+        self.not_modified: Counter[str] = Counter()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address) -> None:
+        pass  # connections of responses dropped unclosed are reset on purpose
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Origin
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        with self.server.lock:
+            self.server.hits[path] += 1
+        kind = path.strip("/").split("/")[0]
+        body = f"{path} #{self.server.hits[path]}".encode()
+        headers = {"Cache-Control": "max-age=60"}
+
+        if kind == "short":
+            headers["Cache-Control"] = "max-age=1"
+        elif kind == "etag":
+            headers = {"Cache-Control": "max-age=0", "ETag": '"v1"'}
+            if self.headers.get("If-None-Match") == '"v1"':
+                with self.server.lock:
+                    self.server.not_modified[path] += 1
+                self._send(304, b"", headers)
+                return
+            body = b"etag body"
+        elif kind == "vary":
+            headers["Vary"] = "Accept-Language"
+            body = f"{self.headers.get('Accept-Language')} #{self.server.hits[path]}"
+            body = body.encode()
+        elif kind == "nostore":
+            headers["Cache-Control"] = "no-store, max-age=60"
+        elif kind == "private":
+            headers["Cache-Control"] = "private, max-age=60"
+        elif kind == "blob":
+            body = body.ljust(BLOB_BYTES, b".")
+        elif kind == "slow":
+            headers = {"Cache-Control": "no-store"}
+            with self.server.lock:
+                self.server.active += 1
+                self.server.max_active = max(self.server.max_active, self.server.active)
+            time.sleep(SLOW_SECONDS)
+            with self.server.lock:
+                self.server.active -= 1
+        self._send(200, body, headers)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._send(204, b"", {})
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def _client(cache: HTTPCache, per_host: int = 6) -> httpx.Client:
+    transport = HostLimitedTransport(httpx.HTTPTransport(), per_host)
+    return httpx.Client(transport=CachingTransport(transport, cache))
+
+
+def _cache(max_bytes: int = 1 << 20) -> HTTPCache:
+    return HTTPCache(Path(tempfile.mkdtemp(prefix="http-cache-check-")), max_bytes)
+
+
+def check_freshness(origin: _Origin) -> None:
+    with _client(_cache()) as client:
+        first = client.get(f"{origin.url}/fresh")
+        second = client.get(f"{origin.url}/fresh")
+        assert origin.hits["/fresh"] == 1, origin.hits
+        assert second.extensions.get("from_cache"), "fresh response not cached"
+        assert second.text == first.text
+        assert int(second.headers["age"]) >= 0
+
+        client.get(f"{origin.url}/short")
+        time.sleep(1.1)
+        client.get(f"{origin.url}/short")
+        assert origin.hits["/short"] == 2, "stale response was served"
+
+        client.get(f"{origin.url}/fresh", headers={"Cache-Control": "no-cache"})
+        assert origin.hits["/fresh"] == 2, "request no-cache was ignored"
+
+
+def check_revalidation(origin: _Origin) -> None:
+    with _client(_cache()) as client:
+        first = client.get(f"{origin.url}/etag")
+        second = client.get(f"{origin.url}/etag")
+    assert origin.hits["/etag"] == 2, origin.hits
+    assert origin.not_modified["/etag"] == 1, "no conditional request was sent"
+    assert second.status_code == 200 and second.text == first.text == "etag body"
+
+
+def check_vary(origin: _Origin) -> None:
+    with _client(_cache()) as client:
+        en = client.get(f"{origin.url}/vary", headers={"Accept-Language": "en"})
+        en_again = client.get(f"{origin.url}/vary", headers={"Accept-Language": "en"})
+        fr = client.get(f"{origin.url}/vary", headers={"Accept-Language": "fr"})
+    assert en_again.text == en.text, "matching variant not served from cache"
+    assert fr.text.startswith("fr"), "variant for other headers was served"
+    assert origin.hits["/vary"] == 2, origin.hits
+
+
+def check_no_store(origin: _Origin) -> None:
+    with _client(_cache()) as client:
+        for _ in range(2):
+            client.get(f"{origin.url}/nostore")
+            client.get(f"{origin.url}/private")
+            client.get(
+                f"{origin.url}/fresh-nostore", headers={"Cache-Control": "no-store"}
+            )
+            client.get(
+                f"{origin.url}/fresh-auth", headers={"Authorization": "Bearer x"}
+            )
+    for path in ("/nostore", "/private", "/fresh-nostore", "/fresh-auth"):
+        assert origin.hits[path] == 2, f"{path} was cached"
+
+
+def check_invalidation(origin: _Origin) -> None:
+    with _client(_cache()) as client:
+        client.get(f"{origin.url}/fresh-post")
+        client.post(f"{origin.url}/fresh-post", content=b"x")
+        client.get(f"{origin.url}/fresh-post")
+    assert origin.hits["/fresh-post"] == 2, "POST didn't invalidate the entry"
+
+
+def check_eviction(origin: _Origin) -> None:
+    max_bytes = 64 * 1024  # each blob takes about a tenth of it
+    cache = _cache(max_bytes)
+    with _client(cache) as client:
+        for i in range(30):
+            client.get(f"{origin.url}/blob/{i}")
+        size = sum(f.stat().st_size for f in cache.directory.iterdir())
+        assert size <= max_bytes, f"cache holds {size} bytes, limit {max_bytes}"
+        client.get(f"{origin.url}/blob/29")
+        client.get(f"{origin.url}/blob/0")
+    assert origin.hits["/blob/29"] == 1, "most recent entry was evicted"
+    assert origin.hits["/blob/0"] == 2, "oldest entry was kept"
+
+
+def check_host_limit(origin: _Origin) -> None:
+    per_host = 2
+    with _client(_cache(), per_host) as client, ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: client.get(f"{origin.url}/slow/{i}"), range(8)))
+    assert origin.max_active == per_host, f"{origin.max_active} requests at once"
+
+    origin.max_active = 0
+    transport = AsyncHostLimitedTransport(httpx.AsyncHTTPTransport, per_host)
+
+    async def fetch_all(loop_id: int) -> None:
+        # One client per loop, as each session runs its own event loop.
+        async with httpx.AsyncClient(transport=transport) as client:
+            await asyncio.gather(
+                *(client.get(f"{origin.url}/slow/{loop_id}-{i}") for i in range(4))
+            )
+
+    with ThreadPoolExecutor(3) as pool:
+        list(pool.map(lambda i: asyncio.run(fetch_all(i)), range(3)))
+    assert origin.max_active == per_host, f"{origin.max_active} async requests at once"
+
+
+def check_host_slots(origin: _Origin) -> None:
+    url = f"{origin.url}/nostore/stream"  # not read by the cache
+    timeout = httpx.Timeout(5.0, pool=0.2)
+    with _client(_cache(), per_host=1) as client:
+        with release_host_slots():
+            response = client.send(client.build_request("GET", url), stream=True)
+            try:
+                client.get(url, timeout=timeout)
+            except httpx.PoolTimeout:
+                pass
+            else:
+                raise AssertionError("a busy host didn't time out")
+        # Left open by the run, which has ended.
+        client.get(url, timeout=timeout)
+
+        response = client.send(client.build_request("GET", url), stream=True)
+        del response
+        gc.collect()
+        client.get(url, timeout=timeout)  # the slot was freed with the response
+
+
+CHECKS: dict[str, Callable[[_Origin], None]] = {
+    "freshness": check_freshness,
+    "revalidation": check_revalidation,
+    "vary": check_vary,
+    "no-store": check_no_store,
+    "invalidation": check_invalidation,
+    "eviction": check_eviction,
+    "host limit": check_host_limit,
+    "host slots": check_host_slots,
+}
+
+
+def main() -> int:
+    failed = 0
+    for name, check in CHECKS.items():
+        origin = _Origin()
+        threading.Thread(target=origin.serve_forever, daemon=True).start()
+        try:
+            check(origin)
+        except AssertionError as e:
+            failed += 1
+            print(f"{name:<14} FAILED: {e}")
+        else:
+            print(f"{name:<14} ok")
+        finally:
+            origin.shutdown()
+            origin.server_close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
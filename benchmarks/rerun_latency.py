@@ -0,0 +1,165 @@
+"""
+Headless rerun-latency benchmark over every engine and bundled example.
+
+Drives `src/main.py` (through `bench_app.py`) with Streamlit's AppTest, once
+per example: a cold run right after the example is selected, then several
+warm reruns triggered by moving the "Resize Panels" slider. For each it
+records wall time of `get_settings`, `get_code`, the editor render and
+`engine.run`, plus the peak traced memory of one extra rerun.
+
+Usage:
+    python benchmarks/rerun_latency.py --output bench.json
+    python benchmarks/rerun_latency.py --baseline bench.json --threshold 0.25
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from stub_server import patch_httpx, patch_requests, start_stub_server  # noqa: E402
+
+from catalog import EXAMPLE_CATALOG  # noqa: E402
+from config import ENGINE_REGISTRY  # noqa: E402
+
+BENCH_APP = str(Path(__file__).resolve().parent / "bench_app.py")
+METRICS = ("get_settings", "get_code", "editor_render", "engine_run", "total")
+MIN_REGRESSION_MS = 2.0  # ignore differences below timer noise
+
+
+def _rerun(at: AppTest) -> dict[str, float]:
+    at.run()
+    timings = dict(at.session_state["bench_timings"])
+    return {m: round(timings.get(m, 0.0), 3) for m in METRICS}
+
+
+def bench_example(engine: str, example: str, reruns: int) -> dict:
+    at = AppTest.from_file(BENCH_APP, default_timeout=120)
+    at.run()
+    at.selectbox(key="app_engine").set_value(engine).run()
+    at.session_state["example_selector"] = example
+
+    cold = _rerun(at)
+    warm_runs = []
+    for i in range(reruns):
+        at.slider(key="split_ratio").set_value(4 + i % 3)
+        warm_runs.append(_rerun(at))
+    warm = {m: round(statistics.median(r[m] for r in warm_runs), 3) for m in METRICS}
+
+    tracemalloc.start()
+    try:
+        at.slider(key="split_ratio").set_value(5)
+        at.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "engine": engine,
+        "example": example,
+        "cold": cold,
+        "warm": warm,
+        "peak_memory_kib": peak // 1024,
+        "errors": [e.value for e in at.error] + [str(e.value) for e in at.exception],
+    }
+
+
+def run_suite(reruns: int, engines: list[str] | None = None) -> dict:
+    server = start_stub_server()
+    patch_requests(server)
+    patch_httpx(server)
+
+    results = []
+    for engine in ENGINE_REGISTRY.names():
+        if engines and engine not in engines:
+            continue
+        for example in EXAMPLE_CATALOG.examples(ENGINE_REGISTRY.get(engine)):
+            result = bench_example(engine, example, reruns)
+            results.append(result)
+            print(
+                f"{engine:<22} {example:<40} "
+                f"cold {result['cold']['total']:>9.1f} ms  "
+                f"warm {result['warm']['total']:>9.1f} ms  "
+                f"peak {result['peak_memory_kib']:>7} KiB"
+            )
+
+    server.shutdown()
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "reruns": reruns,
+        },
+        "results": results,
+    }
+
+
+def _flatten(report: dict) -> dict[str, float]:
+    flat = {}
+    for r in report["results"]:
+        for phase in ("cold", "warm"):
+            for metric, value in r[phase].items():
+                flat[f"{r['engine']} / {r['example']} / {phase} / {metric}"] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Lists metrics that got slower than baseline by more than threshold.
+
+    Args:
+        baseline (dict): A previous report.
+        current (dict): The report to check.
+        threshold (float): Allowed relative slowdown, e.g. 0.25 for 25%.
+
+    Returns:
+        list[str]: One line per regression.
+    """
+    base, cur = _flatten(baseline), _flatten(current)
+    regressions = []
+    for key, value in cur.items():
+        before = base.get(key)
+        if before is None:
+            continue
+        if value - before > MIN_REGRESSION_MS and value > before * (1 + threshold):
+            regressions.append(f"{key}: {before:.1f} ms -> {value:.1f} ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reruns", type=int, default=5, help="warm reruns per example")
+    parser.add_argument("--engine", action="append", help="limit to engine(s)")
+    parser.add_argument("--output", type=Path, help="write JSON results here")
+    parser.add_argument("--baseline", type=Path, help="compare against this report")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed relative slowdown"
+    )
+    args = parser.parse_args()
+
+    report = run_suite(args.reruns, args.engine)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(
+            json.loads(args.baseline.read_text()), report, args.threshold
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
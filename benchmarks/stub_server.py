@@ -0,0 +1,134 @@
+"""
+Local HTTP stand-in for the third-party APIs used by the bundled examples.
+
+`patch_requests()` and `patch_httpx()` rewrite every `requests` and `httpx`
+call (including the snippets' shared `http_client`) to
+`http://127.0.0.1:<port>/<original host>/<original path>`, so network-bound
+examples run offline and with stable latency.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+AREAS = ["Ang Mo Kio", "Bedok", "Bishan", "Clementi", "Jurong West", "Tampines"]
+FORECASTS = ["Fair (Day)", "Partly Cloudy (Day)", "Light Rain", "Thundery Showers"]
+
+
+def _hacker_news(path: str) -> object | None:
+    if path == "/v0/topstories.json":
+        return list(range(1, 501))
+    if path.startswith("/v0/item/") and path.endswith(".json"):
+        item_id = int(path.removeprefix("/v0/item/").removesuffix(".json"))
+        return {
+            "id": item_id,
+            "type": "story",
+            "title": f"Story number {item_id}",
+            "by": f"user{item_id % 17}",
+            "score": (item_id * 37) % 500,
+            "descendants": (item_id * 11) % 200,
+            "time": 1_700_000_000 + item_id * 60,
+            "url": f"https://example.com/{item_id}",
+        }
+    return None
+
+
+def _weather(path: str) -> object | None:
+    if path != "/v2/real-time/api/two-hr-forecast":
+        return None
+    return {
+        "code": 0,
+        "data": {
+            "area_metadata": [
+                {
+                    "name": name,
+                    "label_location": {
+                        "latitude": 1.30 + i * 0.02,
+                        "longitude": 103.75 + i * 0.03,
+                    },
+                }
+                for i, name in enumerate(AREAS)
+            ],
+            "items": [
+                {
+                    "update_timestamp": "2025-01-01T08:00:00+08:00",
+                    "valid_period": {"text": "8 AM to 10 AM"},
+                    "forecasts": [
+                        {"area": name, "forecast": FORECASTS[i % len(FORECASTS)]}
+                        for i, name in enumerate(AREAS)
+                    ],
+                }
+            ],
+        },
+    }
+
+
+ROUTES = {
+    "hacker-news.firebaseio.com": _hacker_news,
+    "api-open.data.gov.sg": _weather,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        _, host, path = self.path.split("/", 2)
+        route = ROUTES.get(host)
+        payload = route("/" + path.split("?")[0]) if route else None
+        if payload is None:
+            self.send_error(404)
+            return
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_stub_server() -> ThreadingHTTPServer:
+    """Starts the stub server on a free localhost port in a daemon thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _stub_url(server: ThreadingHTTPServer, url: str) -> str:
+    parts = urlsplit(url)
+    if parts.hostname in ("127.0.0.1", "localhost"):
+        return url
+    stub = f"http://127.0.0.1:{server.server_address[1]}/{parts.hostname}{parts.path}"
+    return f"{stub}?{parts.query}" if parts.query else stub
+
+
+def patch_requests(server: ThreadingHTTPServer) -> None:
+    """Redirects all `requests` traffic in this process to the stub server."""
+    original = requests.Session.request
+
+    def request(self, method, url, *args, **kwargs):
+        return original(self, method, _stub_url(server, url), *args, **kwargs)
+
+    requests.Session.request = request
+
+
+def patch_httpx(server: ThreadingHTTPServer) -> None:
+    """Redirects all `httpx` traffic in this process to the stub server."""
+    original = httpx.HTTPTransport.handle_request
+    original_async = httpx.AsyncHTTPTransport.handle_async_request
+
+    def handle_request(self, request):
+        request.url = httpx.URL(_stub_url(server, str(request.url)))
+        return original(self, request)
+
+    async def handle_async_request(self, request):
+        request.url = httpx.URL(_stub_url(server, str(request.url)))
+        return await original_async(self, request)
+
+    httpx.HTTPTransport.handle_request = handle_request
+    httpx.AsyncHTTPTransport.handle_async_request = handle_async_request
@@ -0,0 +1,326 @@
+"""
+Local HTTP API for running snippets without the UI.
+
+    POST /run     {"engine": "Python", "code": "print(1)", "stream": true}
+    GET  /health  queue and worker counts
+
+Runs are executed by the engines' run_headless() on a fixed number of worker
+threads fed by a bounded queue; when the queue is full, requests get 503 with
+Retry-After. Requests for code that is already queued or running on the same
+engine join that job instead of executing it again.
+
+A streamed run answers with chunked JSON Lines: a {"job": ...} header, then
+{"stdout": ...} records as the snippet prints, then a final {"done": true, ...}
+record with `ok`, `seconds`, any displayed `tables` as CSV and `html` or
+`error`. With "stream": false the final record alone is returned, including
+the whole `stdout`.
+
+The API starts with the app if `APP_API_SERVER` is on, or standalone:
+    python src/api.py
+"""
+
+import json
+import queue
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+from config import ENGINE_REGISTRY
+from engines import EngineRegistry, HeadlessResult
+from engines.console import ConsoleLog
+from settings import settings
+
+MAX_REQUEST_BYTES = 1024 * 1024
+STREAM_INTERVAL = 0.1  # seconds between stdout records of a streamed run
+RETRY_AFTER = 1  # seconds suggested to clients turned away by a full queue
+
+
+class QueueFullError(Exception):
+    """Raised when a job can't be queued because the queue is full."""
+
+
+@dataclass(eq=False)
+class Job:
+    """A queued or running snippet, shared by every request for the same code."""
+
+    engine: str
+    code: str
+    key: tuple[str, str]
+    console: ConsoleLog
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    done: threading.Event = field(default_factory=threading.Event)
+    result: HeadlessResult | None = None
+    seconds: float = 0.0
+
+    def final_record(self, with_stdout: bool) -> dict:
+        """Returns the record reporting the finished job."""
+        result = asdict(self.result)
+        if not with_stdout:
+            result.pop("stdout")
+        return {
+            "done": True,
+            "ok": self.result.error is None,
+            "seconds": round(self.seconds, 6),
+            **{k: v for k, v in result.items() if v is not None},
+        }
+
+
+class ExecutionService:
+    """
+    Bounded job queue drained by `workers` threads.
+
+    Jobs are keyed by the engine's cache key (engine type and source hash)
+    while they are queued or running, so identical concurrent requests are
+    executed once. Finished jobs are not kept: the same code submitted again
+    later runs again.
+    """
+
+    def __init__(self, registry: EngineRegistry, workers: int, queue_size: int):
+        self._registry = registry
+        self._queue: queue.Queue[Job] = queue.Queue(maxsize=queue_size)
+        self._jobs: dict[tuple[str, str], Job] = {}
+        self._running = 0
+        self._lock = threading.Lock()
+        self.workers = workers
+        for i in range(workers):
+            threading.Thread(
+                target=self._work, name=f"api-worker-{i}", daemon=True
+            ).start()
+
+    def submit(self, engine_name: str, code: str) -> tuple[Job, bool]:
+        """
+        Queues code to run on an engine, or joins the job already running it.
+
+        Args:
+            engine_name (str): A registered engine name.
+            code (str): The code to execute or render.
+
+        Returns:
+            tuple[Job, bool]: The job, and whether it was already in flight.
+
+        Raises:
+            KeyError: If no engine is registered under engine_name.
+            QueueFullError: If the job queue is full.
+        """
+        engine = self._registry.get(engine_name)
+        key = engine.cache_key(code)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                return job, True
+            job = Job(
+                engine=engine_name,
+                code=code,
+                key=key,
+                console=ConsoleLog(memory_limit=settings.console_memory_bytes),
+            )
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError from None
+            self._jobs[key] = job
+        return job, False
+
+    def stats(self) -> dict:
+        """Returns the number of workers, queue slots, queued and running jobs."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self._queue.maxsize,
+                "queued": self._queue.qsize(),
+                "running": self._running,
+            }
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._running += 1
+            start = time.perf_counter()
+            try:
+                engine = self._registry.get(job.engine)
+                job.result = engine.run_headless(job.code, job.console)
+            except Exception as e:
+                job.result = HeadlessResult(error=f"{type(e).__name__}: {e}")
+            job.seconds = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                del self._jobs[job.key]
+            job.done.set()
+
+
+class _APIHandler(BaseHTTPRequestHandler):
+    server: "APIServer"
+    protocol_version = "HTTP/1.1"  # for chunked responses and keep-alive
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/health":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+        self._send_json(HTTPStatus.OK, self.server.service.stats())
+
+    def do_POST(self) -> None:
+        if self.path.split("?", 1)[0] != "/run":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            # The body can't be delimited, so the connection can't be reused.
+            self.close_connection = True
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"})
+            return
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._send_json(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request too large"}
+            )
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            engine, code = request["engine"], request["code"]
+            stream = bool(request.get("stream", True))
+            if not isinstance(engine, str) or not isinstance(code, str):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            self._send_json(
+                HTTPStatus.BAD_REQUEST,
+                {"error": 'Expected {"engine": str, "code": str, "stream": bool}'},
+            )
+            return
+
+        try:
+            job, joined = self.server.service.submit(engine, code)
+        except KeyError:
+            self._send_json(
+                HTTPStatus.NOT_FOUND, {"error": f"Unknown engine {engine!r}"}
+            )
+            return
+        except QueueFullError:
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "Job queue is full"},
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+            return
+
+        if stream:
+            self._stream(job, joined)
+        else:
+            job.done.wait()
+            self._send_json(
+                HTTPStatus.OK,
+                {"job": job.id, "deduplicated": joined, **job.final_record(True)},
+            )
+
+    def _stream(self, job: Job, joined: bool) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            self._send_chunk({"job": job.id, "deduplicated": joined})
+            sent = 0
+            while True:
+                finished = job.done.wait(STREAM_INTERVAL)
+                # The log only holds whole characters up to its current size.
+                size = job.console.size
+                if size > sent:
+                    self._send_chunk(
+                        {"stdout": job.console.read_range(sent, size - sent)}
+                    )
+                    sent = size
+                if finished:
+                    break
+            self._send_chunk(job.final_record(False))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The job keeps running for anyone else waiting on it.
+            self.close_connection = True
+
+    def _send_chunk(self, record: dict) -> None:
+        data = json.dumps(record).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(
+        self, status: HTTPStatus, body: dict, headers: dict[str, str] | None = None
+    ) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("API server: {}", format % args)
+
+
+class APIServer(ThreadingHTTPServer):
+    """HTTP front end of an ExecutionService, serving on a daemon thread."""
+
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog; bursts beyond it wait on SYN retries
+
+    def __init__(self, host: str, port: int, service: ExecutionService):
+        super().__init__((host, port), _APIHandler)
+        self.service = service
+        self.url = f"http://{host}:{self.server_address[1]}"
+
+    def start(self) -> None:
+        """Starts serving on a background thread."""
+        threading.Thread(
+            target=self.serve_forever, name="api-server", daemon=True
+        ).start()
+
+
+_api_server: APIServer | None = None
+_api_server_failed = False
+_api_server_lock = threading.Lock()
+
+
+def create_api_server(port: int | None = None) -> APIServer:
+    """Creates an API server for the app's engines, configured by settings."""
+    service = ExecutionService(
+        ENGINE_REGISTRY,
+        workers=settings.api_workers,
+        queue_size=settings.api_queue_size,
+    )
+    return APIServer(
+        settings.host, settings.api_port if port is None else port, service
+    )
+
+
+def start_api_server() -> None:
+    """Starts the API in the background, once per process, if `APP_API_SERVER` is on."""
+    global _api_server, _api_server_failed
+    if not settings.api_server:
+        return
+    with _api_server_lock:
+        if _api_server is not None or _api_server_failed:
+            return
+        try:
+            _api_server = create_api_server()
+        except OSError as e:
+            logger.warning("API server unavailable: {}", e)
+            _api_server_failed = True
+            return
+        _api_server.start()
+    logger.info("Serving the execution API at {}", _api_server.url)
+
+
+if __name__ == "__main__":
+    server = create_api_server()
+    logger.info("Serving the execution API at {}", server.url)
+    server.serve_forever()
@@ -0,0 +1,186 @@
+"""
+Headless batch runner for snippets.
+
+Runs snippet files through any engine without a browser, in parallel across
+a process pool, and writes one JSON object per snippet (JSON Lines) as runs
+finish: Python engines report captured stdout and displayed tables as CSV,
+HTML engines the final document, and every record carries the run's wall
+time. With no paths, all bundled examples of the selected engines (default:
+every engine) are run.
+
+Engines are given by registered name ("Python") or as "module:ClassName"
+targets for any BaseEngine subclass importable from src/. Exits non-zero if
+any snippet failed.
+
+Usage:
+    python src/batch.py --output batch.jsonl
+    python src/batch.py --engine Python path/to/snippets --workers 8
+    python src/batch.py --engine mypackage.engines:MyEngine snippet.txt
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from pathlib import Path
+
+from streamlit import config
+from streamlit.logger import set_log_level
+
+from engines import EngineRegistry, HeadlessResult
+
+# Engines are loaded once per worker process, on its first snippet.
+_WORKER_REGISTRY = EngineRegistry()
+
+
+def _init_worker() -> None:
+    # Without a session Streamlit warns on every st.* call, and the warnings
+    # would end up in the captured stdout. Its config is parsed first, as
+    # parsing resets the log level.
+    config.get_config_options()
+    set_log_level("error")
+
+
+def run_snippet(name: str, target: str, path: str) -> dict:
+    """
+    Runs one snippet file in a worker process.
+
+    Args:
+        name (str): Engine name to report.
+        target (str): The engine's "module:ClassName" import target.
+        path (str): The snippet file.
+
+    Returns:
+        dict: The JSON Lines record for the snippet.
+    """
+    if name not in _WORKER_REGISTRY.names():
+        _WORKER_REGISTRY.register(name, target)
+    engine = _WORKER_REGISTRY.get(name)
+    code = Path(path).read_text(encoding="utf-8")
+
+    start = time.perf_counter()
+    try:
+        result = engine.run_headless(code)
+    except Exception as e:
+        result = HeadlessResult(error=f"{type(e).__name__}: {e}")
+    seconds = time.perf_counter() - start
+
+    record = {
+        "engine": name,
+        "path": path,
+        "ok": result.error is None,
+        "seconds": round(seconds, 6),
+    }
+    record.update((k, v) for k, v in asdict(result).items() if v is not None)
+    return record
+
+
+def _resolve_engine(registry: EngineRegistry, spec: str) -> tuple[str, str]:
+    if spec in registry.names():
+        return spec, registry.target(spec)
+    if ":" in spec:
+        registry.register(spec, spec)
+        return spec, spec
+    raise SystemExit(
+        f"Unknown engine {spec!r}; use one of {list(map(str, registry.names()))} "
+        "or module:ClassName"
+    )
+
+
+def _snippet_files(paths: list[Path], suffixes: set[str]) -> list[Path]:
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files += sorted(
+                p
+                for p in path.rglob("*")
+                if p.is_file() and (not suffixes or p.suffix in suffixes)
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def collect_jobs(
+    registry: EngineRegistry, engines: list[str], paths: list[Path]
+) -> list[tuple[str, str, str]]:
+    """
+    Lists the snippets to run as (engine name, import target, path) jobs.
+
+    Files under a directory are matched by the suffixes of the engine's
+    bundled examples (all files if it has none).
+
+    Args:
+        registry (EngineRegistry): Where engine names are looked up.
+        engines (list[str]): Engine names or targets; all registered if empty.
+        paths (list[Path]): Snippet files or directories; bundled examples
+            if empty.
+
+    Returns:
+        list[tuple[str, str, str]]: The jobs, in a stable order.
+    """
+    specs = engines or registry.names()
+    jobs = []
+    for name, target in (_resolve_engine(registry, spec) for spec in specs):
+        examples = sorted(registry.get(name).list_examples())
+        if paths:
+            files = _snippet_files(paths, {p.suffix for p in examples})
+        else:
+            files = examples
+        jobs += [(name, target, str(file)) for file in files]
+    return jobs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="*", type=Path, help="snippet files or dirs")
+    parser.add_argument(
+        "--engine",
+        action="append",
+        default=[],
+        help="engine name or module:ClassName (repeatable; default: all engines)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", type=Path, help="JSON Lines file (default: stdout)")
+    args = parser.parse_args()
+    if args.paths and len(args.engine) != 1:
+        parser.error("running snippet paths needs exactly one --engine")
+
+    # Imported here so that workers, which import this module, don't load
+    # the app's configuration.
+    from config import ENGINE_REGISTRY
+
+    jobs = collect_jobs(ENGINE_REGISTRY, args.engine, args.paths)
+
+    out = args.output.open("w", encoding="utf-8") if args.output else sys.stdout
+    failed = 0
+    start = time.perf_counter()
+    # Spawned workers don't inherit the parent's threads or loaded engines.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        args.workers, mp_context=context, initializer=_init_worker
+    ) as pool:
+        futures = [pool.submit(run_snippet, *job) for job in jobs]
+        for future in as_completed(futures):
+            record = future.result()
+            failed += not record["ok"]
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    elapsed = time.perf_counter() - start
+    if out is not sys.stdout:
+        out.close()
+
+    print(
+        f"{len(jobs)} snippets in {elapsed:.2f}s "
+        f"({len(jobs) / elapsed:.1f}/s), {failed} failed",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from engines import BaseEngine
+from settings import settings
+
+
+@dataclass(frozen=True, slots=True)
+class Example:
+    """A bundled example file, loaded and indexed once."""
+
+    key: str  # file name, unique within an engine's examples
+    name: str  # display name shown in the examples selectbox
+    path: Path
+    code: str
+    digest: str  # sha256 of code
+    language: str
+
+
+@dataclass(frozen=True, slots=True)
+class _EngineIndex:
+    examples: dict[str, Example]
+    dirs: dict[Path, int]  # example directory -> mtime_ns when indexed
+
+
+class _InvalidateOnChange(FileSystemEventHandler):
+    def __init__(self, catalog: "ExampleCatalog", engine_key: str):
+        self._catalog = catalog
+        self._engine_key = engine_key
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type not in ("opened", "closed_no_write"):
+            self._catalog.invalidate(self._engine_key)
+
+
+class ExampleCatalog:
+    """
+    Process-wide index of every engine's example files.
+
+    Each engine's examples are listed, read and hashed the first time they are
+    requested and then served from memory to all sessions. An index is only
+    rebuilt when the mtime of an example directory changes (files added,
+    removed or renamed) or, if `APP_CATALOG_WATCH` is on, when a filesystem
+    watcher reports that a file in it was modified.
+    """
+
+    def __init__(self, watch: bool = False):
+        self._indexes: dict[str, _EngineIndex] = {}
+        self._lock = threading.Lock()
+        self._watch = watch
+        self._observer = None
+        self._watched: set[Path] = set()
+        self.version = 0
+
+    def examples(self, engine: BaseEngine) -> dict[str, Example]:
+        """
+        Returns the engine's examples, keyed by file name and sorted by it.
+
+        Args:
+            engine (BaseEngine): The engine to get examples for.
+
+        Returns:
+            dict[str, Example]: The indexed examples.
+        """
+        engine_key = type(engine).__qualname__
+        with self._lock:
+            index = self._indexes.get(engine_key)
+        if index is None or self._is_stale(index):
+            index = self._build(engine)
+            with self._lock:
+                self._indexes[engine_key] = index
+                self.version += 1
+            self._watch_dirs(engine_key, index)
+        return index.examples
+
+    def get(self, engine: BaseEngine, key: str) -> Example | None:
+        """Returns a single example by file name, or None if it doesn't exist."""
+        return self.examples(engine).get(key)
+
+    def invalidate(self, engine_key: str | None = None) -> None:
+        """Forces the given engine's index (or every index) to be rebuilt."""
+        with self._lock:
+            if engine_key is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(engine_key, None)
+
+    def _build(self, engine: BaseEngine) -> _EngineIndex:
+        examples: dict[str, Example] = {}
+        dirs: dict[Path, int] = {}
+        for path in sorted(engine.list_examples()):
+            code = path.read_text()
+            examples[path.name] = Example(
+                key=path.name,
+                name=path.stem.title().replace("_", " "),
+                path=path,
+                code=code,
+                digest=hashlib.sha256(code.encode()).hexdigest(),
+                language=engine.language,
+            )
+            dirs.setdefault(path.parent, path.parent.stat().st_mtime_ns)
+        return _EngineIndex(examples=examples, dirs=dirs)
+
+    @staticmethod
+    def _is_stale(index: _EngineIndex) -> bool:
+        try:
+            return any(d.stat().st_mtime_ns != m for d, m in index.dirs.items())
+        except OSError:
+            return True
+
+    def _watch_dirs(self, engine_key: str, index: _EngineIndex) -> None:
+        if not self._watch:
+            return
+        try:
+            with self._lock:
+                if self._observer is None:
+                    self._observer = Observer()
+                    self._observer.daemon = True
+                    self._observer.start()
+                for directory in index.dirs.keys() - self._watched:
+                    handler = _InvalidateOnChange(self, engine_key)
+                    self._observer.schedule(handler, str(directory))
+                    self._watched.add(directory)
+        except OSError as e:
+            logger.warning("Example catalog falls back to mtime checks: {}", e)
+            self._watch = False
+
+
+EXAMPLE_CATALOG = ExampleCatalog(watch=settings.catalog_watch)
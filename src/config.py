@@ -1,6 +1,7 @@
 from enum import StrEnum
 
-from engines import JSEngine, PythonEngine, ReactEngine, StreamlitEngine
+from engines import EngineRegistry
+from settings import settings
 
 TITLE = "Piece of Code"
 CODE_PREVIEW_WIDTH = 10
@@ -19,12 +20,15 @@ class Engine(StrEnum):
     REACT = "React (TypeScript)"
 
 
-ENGINE_MAPPING = {
-    Engine.PYTHON: PythonEngine,
-    Engine.STREAMLIT: StreamlitEngine,
-    Engine.JS: JSEngine,
-    Engine.REACT: ReactEngine,
-}
+ENGINE_REGISTRY = EngineRegistry(
+    {
+        Engine.PYTHON: "engines.python.python_engine:PythonEngine",
+        Engine.STREAMLIT: "engines.streamlit.streamlit_engine:StreamlitEngine",
+        Engine.JS: "engines.js.js_engine:JSEngine",
+        Engine.REACT: "engines.react.react_engine:ReactEngine",
+    }
+)
+ENGINE_REGISTRY.load_plugins()
 
 
 run_button_settings = {
@@ -39,11 +43,35 @@ run_button_settings = {
     "bindKey": {"win": "Ctrl-Enter", "mac": "Command-Enter"},
 }
 
+profile_button_settings = {
+    "name": "Profile",
+    "feather": "Activity",
+    "hasText": True,
+    "showWithIcon": True,
+    "commands": [["response", "profile"]],
+    "alwaysOn": True,
+    "style": {"top": "0.44rem", "right": "5.2rem"},
+}
+
+share_button_settings = {
+    "name": "Share",
+    "feather": "Share2",
+    "hasText": True,
+    "showWithIcon": True,
+    "commands": [["response", "share"]],
+    "alwaysOn": True,
+    "style": {"top": "0.44rem", "right": "5.2rem"},
+}
+
 
 PYTHON_EDITOR_SETTINGS = {
     "height": [26, 26],  # lines
     "focus": True,
-    "buttons": [run_button_settings],
+    "buttons": [
+        run_button_settings,
+        profile_button_settings,
+        {**share_button_settings, "style": {"top": "0.44rem", "right": "10.6rem"}},
+    ],
     "props": {
         "enableBasicAutocompletion": True,
         "enableLiveAutocompletion": True,
@@ -51,3 +79,21 @@ PYTHON_EDITOR_SETTINGS = {
     },
     "options": {"showLineNumbers": True, "wrap": True},
 }
+
+# Engines without a profiler only get the Run and Share buttons
+EDITOR_SETTINGS = {
+    **PYTHON_EDITOR_SETTINGS,
+    "buttons": [run_button_settings, share_button_settings],
+}
+
+
+def with_auto_run(editor_settings: dict) -> dict:
+    """Returns editor settings that also send the code after each pause in typing."""
+    return {
+        **editor_settings,
+        "response_mode": "debounce",
+        "props": {
+            **editor_settings["props"],
+            "debounceChangePeriod": settings.auto_run_delay_ms,
+        },
+    }
@@ -1,15 +1,42 @@
-from .base_engine import BaseEngine
-from .js.js_engine import JSEngine
-from .python.python_engine import PythonEngine
-from .python_base_engine import PythonBaseEngine
-from .react.react_engine import ReactEngine
-from .streamlit.streamlit_engine import StreamlitEngine
+import importlib
+from typing import TYPE_CHECKING
+
+from .base_engine import BaseEngine, HeadlessResult, RunOptions
+from .registry import EngineRegistry
+
+if TYPE_CHECKING:
+    from .js.js_engine import JSEngine
+    from .python.python_engine import PythonEngine
+    from .python_base_engine import PythonBaseEngine
+    from .react.react_engine import ReactEngine
+    from .streamlit.streamlit_engine import StreamlitEngine
+
+# Engine modules are imported on first attribute access so that importing
+# this package doesn't pay for every engine's dependencies.
+_LAZY_EXPORTS = {
+    "JSEngine": ".js.js_engine",
+    "PythonBaseEngine": ".python_base_engine",
+    "PythonEngine": ".python.python_engine",
+    "ReactEngine": ".react.react_engine",
+    "StreamlitEngine": ".streamlit.streamlit_engine",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "BaseEngine",
+    "EngineRegistry",
+    "HeadlessResult",
     "JSEngine",
     "PythonBaseEngine",
     "PythonEngine",
     "ReactEngine",
+    "RunOptions",
     "StreamlitEngine",
 ]
@@ -0,0 +1,316 @@
+import contextlib
+import functools
+import importlib
+import marshal
+import multiprocessing
+import pickle
+import queue
+import sys
+import threading
+import time
+import traceback
+import types
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from multiprocessing.connection import Connection
+from types import CodeType
+from typing import TYPE_CHECKING, TextIO
+
+from settings import settings
+
+from .budgets import count_lines
+from .cancellation import RunInterrupted, current_cancel_token
+from .console import capture_output
+from .display import capture_display, display, table_from_ipc, table_to_ipc, to_table
+from .event_loop import exec_snippet
+
+if TYPE_CHECKING:
+    from .python_base_engine import PythonBaseEngine
+
+CANCEL_POLL_INTERVAL = 0.05  # seconds between cancellation checks on a worker
+
+
+class RemoteTraceback(Exception):
+    """Carries the formatted traceback of an exception raised in a worker."""
+
+    def __init__(self, tb: str):
+        super().__init__(tb)
+        self.tb = tb
+
+    def __str__(self) -> str:
+        return self.tb
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised when a worker process dies before finishing a run."""
+
+
+class ExecutionBackend(ABC):
+    """
+    Strategy for executing a compiled snippet on behalf of a Python engine.
+
+    Backends write everything the snippet prints to `stdout` and return the
+    exception the snippet raised, if any, so engines can render it.
+    """
+
+    @abstractmethod
+    def execute(
+        self, engine: "PythonBaseEngine", code: CodeType, stdout: TextIO
+    ) -> BaseException | None:
+        """
+        Executes the compiled code.
+
+        Args:
+            engine (PythonBaseEngine): The engine providing the execution globals.
+            code (CodeType): The compiled snippet.
+            stdout (TextIO): Where the snippet's printed output is written.
+
+        Returns:
+            BaseException | None: The exception raised by the snippet, if any.
+        """
+        pass
+
+
+class InProcessBackend(ExecutionBackend):
+    """
+    Executes snippets with exec() in the calling thread.
+
+    Output is captured per context, so concurrent sessions need no lock.
+    """
+
+    def execute(
+        self, engine: "PythonBaseEngine", code: CodeType, stdout: TextIO
+    ) -> BaseException | None:
+        return self.execute_in(engine.get_execution_globals(), code, stdout)
+
+    def execute_in(
+        self, namespace: dict, code: CodeType, stdout: TextIO
+    ) -> BaseException | None:
+        """Like execute(), but runs code in an existing namespace, e.g. a cell's."""
+        token = current_cancel_token()
+        interruptible = token.interruptible() if token else contextlib.nullcontext()
+        with capture_output(stdout, stderr=stdout):
+            try:
+                with interruptible, count_lines():
+                    exec_snippet(code, namespace)
+            except (Exception, RunInterrupted) as e:
+                return e
+        return None
+
+
+class _PipeWriter:
+    """File-like object that forwards writes from a worker to its parent."""
+
+    def __init__(self, conn: Connection):
+        self._conn = conn
+
+    def write(self, text: str) -> int:
+        if text:
+            self._conn.send(("stdout", text))
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _send_display(conn: Connection, obj: object) -> None:
+    """display() target in a worker: ships tables to the parent as Arrow IPC."""
+    table = to_table(obj)
+    if table is None:
+        print(repr(obj))
+    else:
+        conn.send(("display", table_to_ipc(table)))
+
+
+def _worker_main(conn: Connection, preload: list[str]) -> None:
+    """Worker loop: imports heavy modules once, then executes snippets on demand."""
+    for name in preload:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(name)
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        engine, payload = message
+        sys.stdout = sys.stderr = _PipeWriter(conn)
+        try:
+            with capture_display(functools.partial(_send_display, conn)):
+                exec_snippet(marshal.loads(payload), engine.get_execution_globals())
+            conn.send(("done", None, None))
+        except BaseException as e:
+            tb = traceback.format_exc()
+            try:
+                exc = pickle.loads(pickle.dumps(e))
+            except Exception:
+                exc = RuntimeError(f"{type(e).__name__}: {e}")
+            conn.send(("done", exc, tb))
+        finally:
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+
+# Held while a worker starts with a stand-in __main__; see _bare_main().
+_main_module_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _bare_main() -> Iterator[None]:
+    """
+    Replaces __main__ with an empty module while a worker is spawned.
+
+    Spawned children re-import the parent's __main__ module. Inside the app
+    that is the Streamlit script, which would set the page config and touch
+    session state in every worker, without a ScriptRunContext. Workers only
+    need this module, which they import to unpickle their target.
+    """
+    with _main_module_lock:
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main
+
+
+class _Worker:
+    """Handle on a single pre-started worker process."""
+
+    def __init__(self, ctx, preload: list[str]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, preload), daemon=True
+        )
+        with _bare_main():
+            self.process.start()
+        child_conn.close()
+        self.runs = 0
+        self.healthy = True
+
+    def run(
+        self, engine: "PythonBaseEngine", code: CodeType, stdout: TextIO, timeout: float
+    ) -> BaseException | None:
+        self.runs += 1
+        try:
+            self.conn.send((engine, marshal.dumps(code)))
+        except OSError:  # the worker died while idle
+            self.healthy = False
+            return WorkerCrashedError("Worker process exited unexpectedly.")
+        deadline = time.monotonic() + timeout
+        token = current_cancel_token()
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.healthy = False
+                return TimeoutError(f"Execution exceeded {timeout:g}s and was stopped.")
+            if token is not None and token.cancelled:
+                self.healthy = False  # killed and replaced by the pool
+                return token.error
+            if not self.conn.poll(min(remaining, CANCEL_POLL_INTERVAL)):
+                continue
+            try:
+                kind, *data = self.conn.recv()
+            except (EOFError, OSError):
+                self.healthy = False
+                return WorkerCrashedError("Worker process exited unexpectedly.")
+
+            if kind == "stdout":
+                stdout.write(data[0])
+            elif kind == "display":
+                display(table_from_ipc(data[0]))
+            elif kind == "done":
+                exc, tb = data
+                if exc is not None and tb:
+                    exc.__cause__ = RemoteTraceback(tb)
+                return exc
+
+    def close(self) -> None:
+        if self.healthy:
+            with contextlib.suppress(Exception):
+                self.conn.send(None)
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WorkerPoolBackend(ExecutionBackend):
+    """
+    Executes snippets in a pool of pre-started worker processes.
+
+    Workers import heavy modules up front so runs don't pay for them, are
+    killed when a run exceeds the wall-clock timeout, and are replaced after
+    `max_runs` runs so leaked state doesn't accumulate.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        timeout: float = 30.0,
+        max_runs: int = 50,
+        preload: list[str] | None = None,
+    ):
+        self.timeout = timeout
+        self.max_runs = max_runs
+        self._preload = list(preload or [])
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self._preload)
+
+    def execute(
+        self, engine: "PythonBaseEngine", code: CodeType, stdout: TextIO
+    ) -> BaseException | None:
+        worker = self._idle.get()
+        if not worker.process.is_alive():  # e.g. OOM-killed while idle
+            worker.healthy = False
+            worker.close()
+            worker = self._spawn()
+        try:
+            return worker.run(engine, code, stdout, self.timeout)
+        finally:
+            if not worker.healthy or worker.runs >= self.max_runs:
+                worker.close()
+                worker = self._spawn()
+            self._idle.put(worker)
+
+
+IN_PROCESS_BACKEND = InProcessBackend()
+
+_worker_pool: WorkerPoolBackend | None = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_backend(name: str) -> ExecutionBackend:
+    """
+    Returns the process-wide backend registered under name.
+
+    Args:
+        name (str): Either "in-process" or "worker-pool".
+
+    Returns:
+        ExecutionBackend: The shared backend instance.
+    """
+    global _worker_pool
+
+    if name == "in-process":
+        return IN_PROCESS_BACKEND
+    if name == "worker-pool":
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = WorkerPoolBackend(
+                    size=settings.worker_pool_size,
+                    timeout=settings.worker_timeout,
+                    max_runs=settings.worker_max_runs,
+                    preload=settings.worker_preload,
+                )
+        return _worker_pool
+    raise ValueError(f"Unknown execution backend: {name!r}")
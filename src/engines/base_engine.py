@@ -1,8 +1,32 @@
+import hashlib
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from pathlib import Path
 
 from streamlit.delta_generator import DeltaGenerator
 
+from .console import ConsoleLog
+
+
+@dataclass(frozen=True, slots=True)
+class RunOptions:
+    """Per-run flags passed from the UI to an engine."""
+
+    force: bool = False  # re-execute even if a cached result is available
+    profile: bool = False  # profile the run (engines that support it)
+    cells: bool = False  # re-run only changed `# %%` cells (engines that support it)
+    output: bytes | None = None  # export_output() data to show instead of running
+
+
+@dataclass(frozen=True, slots=True)
+class HeadlessResult:
+    """What a snippet produced when run without a Streamlit session."""
+
+    stdout: str | None = None  # console output (Python engines)
+    html: str | None = None  # final document (HTML engines)
+    error: str | None = None  # formatted exception, if the snippet failed
+    tables: tuple[str, ...] | None = None  # displayed tables as CSV (Python engines)
+
 
 class BaseEngine(ABC):
     """
@@ -18,20 +42,101 @@ class BaseEngine(ABC):
         """The programming language or format this engine supports (e.g., 'python', 'html')."""
         pass
 
+    @property
+    def supports_cells(self) -> bool:
+        """Whether the engine honours RunOptions.cells."""
+        return False
+
+    def reruns_in_fragment(self, code: str) -> bool:
+        """
+        Whether the UI may run code inside a Streamlit fragment, so that
+        widgets the code creates rerun only the preview instead of the whole
+        app. Engines whose code creates no widgets keep this default.
+
+        Args:
+            code (str): The code about to run.
+
+        Returns:
+            bool: Whether the run can be scoped to a fragment.
+        """
+        return False
+
     @abstractmethod
-    def run(self, code: str, container: DeltaGenerator) -> None:
+    def run(
+        self,
+        code: str,
+        container: DeltaGenerator,
+        options: RunOptions | None = None,
+    ) -> None:
         """
         Executes or renders the provided code inside the given container.
 
         Args:
             code (str): The code to execute or render.
             container (DeltaGenerator): The Streamlit container to render output in.
+            options (RunOptions | None): Per-run flags; defaults to RunOptions().
 
         Returns:
             None
         """
         pass
 
+    def cache_key(self, code: str) -> tuple[str, str]:
+        """Returns the (engine type, source hash) key used by the shared caches."""
+        return type(self).__qualname__, hashlib.sha256(code.encode()).hexdigest()
+
+    def prerender(self, code: str) -> bool:
+        """
+        Does the session-independent work of running code ahead of time, e.g.
+        for a bundled example at startup, so that a later run() of the same
+        code renders from the warm cache. Engines that can't do any work
+        outside a Streamlit session keep this default.
+
+        Args:
+            code (str): The code to pre-render.
+
+        Returns:
+            bool: Whether a result was stored in the warm cache.
+        """
+        return False
+
+    def export_output(self, code: str, max_bytes: int | None = None) -> bytes | None:
+        """
+        Serializes the output of this session's latest run of code, or of its
+        warm pre-rendered run, e.g. for the snippet store. A later run() given
+        it as RunOptions.output shows it without executing anything.
+
+        Args:
+            code (str): The code whose output to export.
+            max_bytes (int | None): Largest output to return, if limited.
+
+        Returns:
+            bytes | None: The output, or None if code hasn't run, the output
+                is larger than max_bytes or the engine's output can't be
+                stored.
+        """
+        return None
+
+    def run_headless(
+        self, code: str, console: ConsoleLog | None = None
+    ) -> HeadlessResult:
+        """
+        Executes or renders code without a Streamlit session, e.g. from the
+        batch runner, returning what it produced instead of displaying it.
+
+        Args:
+            code (str): The code to execute or render.
+            console (ConsoleLog | None): Log that engines producing console
+                output write it to, e.g. to read it while the code runs.
+
+        Returns:
+            HeadlessResult: The snippet's output.
+
+        Raises:
+            NotImplementedError: If the engine needs a Streamlit session.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can't run headless")
+
     @abstractmethod
     def list_examples(self) -> list[Path]:
         """Lists available example files for this engine."""
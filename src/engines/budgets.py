@@ -0,0 +1,186 @@
+import contextlib
+import heapq
+import itertools
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from .cancellation import CancelToken, RunInterrupted, current_cancel_token, use_token
+from .console import ConsoleLog
+
+SNIPPET_FILENAME = "<string>"  # filename snippets are compiled with
+RECANCEL_INTERVAL = 0.1  # seconds between cancellations of an expired run
+
+
+@dataclass(frozen=True, slots=True)
+class Budget:
+    """Per-run resource limits; None disables a limit."""
+
+    wall_time: float | None = None  # seconds
+    line_events: int | None = None  # lines executed in the snippet's own code
+    output_chars: int | None = None  # characters written to stdout/stderr
+
+    def __str__(self) -> str:
+        parts = []
+        if self.wall_time is not None:
+            parts.append(f"{self.wall_time:g}s wall time")
+        if self.line_events is not None:
+            parts.append(f"{self.line_events:,} line events")
+        if self.output_chars is not None:
+            parts.append(f"{self.output_chars:,} characters of output")
+        return ", ".join(parts) or "unlimited"
+
+
+class BudgetExceeded(RunInterrupted):
+    """Returned for a run that was stopped for exceeding its Budget."""
+
+
+_current_budget: ContextVar[Budget | None] = ContextVar("budget", default=None)
+
+
+class _Deadlines:
+    """
+    One daemon thread that fires callbacks at deadlines, so giving a run a
+    wall-time budget costs a heap push instead of starting a timer thread.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._cancelled: set[int] = set()
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def add(self, delay: float, callback: Callable[[], None]) -> int:
+        handle = next(self._counter)
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, handle, callback))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="budget-deadlines", daemon=True
+                )
+                self._thread.start()
+            if self._heap[0][1] == handle:
+                self._cond.notify()  # otherwise the thread wakes up earlier anyway
+        return handle
+
+    def remove(self, handle: int) -> None:
+        with self._cond:
+            self._cancelled.add(handle)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                deadline, handle, callback = self._heap[0]
+                delay = deadline - time.monotonic()
+                if handle in self._cancelled:
+                    heapq.heappop(self._heap)
+                    self._cancelled.discard(handle)
+                    continue
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+            callback()
+
+
+_DEADLINES = _Deadlines()
+
+
+@contextlib.contextmanager
+def enforce_budget(budget: Budget) -> Iterator[CancelToken]:
+    """
+    Applies a budget to the run made inside the block.
+
+    The wall-time limit cancels the run's token when it expires, and again
+    every RECANCEL_INTERVAL seconds until the block exits, in case the
+    snippet catches the error and carries on. The other limits are applied
+    through limit_output() and count_lines(). The token is a child of the
+    current one, so a newer rerun still cancels it.
+
+    Args:
+        budget (Budget): The limits to apply.
+
+    Yields:
+        CancelToken: The run's token, cancelled with BudgetExceeded if a
+            limit is hit.
+    """
+    token = CancelToken(parent=current_cancel_token())
+    budget_reset = _current_budget.set(budget)
+    handle = None
+    finished = False
+    lock = threading.Lock()
+
+    def expire() -> None:
+        nonlocal handle
+        token.cancel(error)
+        with lock:
+            if not finished:
+                handle = _DEADLINES.add(RECANCEL_INTERVAL, expire)
+
+    if budget.wall_time is not None:
+        error = BudgetExceeded(
+            f"Execution exceeded {budget.wall_time:g}s of wall time."
+        )
+        handle = _DEADLINES.add(budget.wall_time, expire)
+    try:
+        with use_token(token):
+            yield token
+    finally:
+        with lock:
+            finished = True
+            if handle is not None:
+                _DEADLINES.remove(handle)
+        _current_budget.reset(budget_reset)
+
+
+def limit_output(log: ConsoleLog) -> None:
+    """Makes log cancel the current run once it exceeds the output budget."""
+    budget = _current_budget.get()
+    token = current_cancel_token()
+    if budget is None or budget.output_chars is None or token is None:
+        return
+    error = BudgetExceeded(f"Output exceeded {budget.output_chars:,} characters.")
+    log.limit(budget.output_chars, lambda: token.cancel(error))
+
+
+@contextlib.contextmanager
+def count_lines() -> Iterator[None]:
+    """
+    Enforces the current run's line-event budget on the calling thread with
+    a trace function. Only frames of the snippet itself are traced, so time
+    spent in libraries isn't slowed down.
+    """
+    budget = _current_budget.get()
+    if budget is None or budget.line_events is None:
+        yield
+        return
+
+    remaining = budget.line_events
+
+    def trace_lines(frame, event, arg):
+        nonlocal remaining
+        if event == "line":
+            remaining -= 1
+            if remaining < 0:
+                raise BudgetExceeded(
+                    f"Execution exceeded {budget.line_events:,} line events."
+                )
+        return trace_lines
+
+    def trace_calls(frame, event, arg):
+        if frame.f_code.co_filename == SNIPPET_FILENAME:
+            return trace_lines
+        return None
+
+    previous = sys.gettrace()
+    sys.settrace(trace_calls)
+    try:
+        yield
+    finally:
+        sys.settrace(previous)
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Generic, NamedTuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    """Point-in-time counters for an LRUCache."""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+    weight: int = 0
+
+
+class _Entry(NamedTuple):
+    value: object
+    expires_at: float
+    weight: int
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe, size-bounded least-recently-used cache.
+
+    A single instance is meant to be shared process-wide, so every Streamlit
+    session benefits from entries created by any other session. Entries can
+    optionally expire after `ttl` seconds, and the cache can be bounded by a
+    total weight (e.g. bytes) computed by `weigher` in addition to its length.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: float | None = None,
+        max_weight: int | None = None,
+        weigher: Callable[[V], int] | None = None,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+        if max_weight is not None and weigher is None:
+            raise ValueError("max_weight requires a weigher")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self._weigher = weigher
+        self._data: OrderedDict[K, _Entry] = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Returns the cached value for key (marking it recently used), or default."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry.value  # type: ignore[return-value]
+
+    def put(self, key: K, value: V) -> None:
+        """Stores value under key, evicting the least recently used entries if full."""
+        weight = self._weigher(value) if self._weigher else 0
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = _Entry(value, expires_at, weight)
+            self._weight += weight
+            while len(self._data) > self.maxsize or (
+                self.max_weight is not None and self._weight > self.max_weight
+            ):
+                self._remove(next(iter(self._data)))
+                self._evictions += 1
+
+    def get_or_set(self, key: K, factory: Callable[[], V]) -> V:
+        """
+        Returns the cached value for key, computing and storing it on a miss.
+
+        The factory runs outside the lock, so two sessions missing on the same
+        key at once may both compute it; the last one to finish wins.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)  # type: ignore[arg-type]
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value  # type: ignore[return-value]
+
+    def pop(self, key: K) -> V | None:
+        """Removes key from the cache, returning its value if it was present."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._remove(key)
+            return entry.value  # type: ignore[return-value]
+
+    def clear(self) -> None:
+        """Drops all entries and resets the counters."""
+        with self._lock:
+            self._data.clear()
+            self._weight = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> CacheStats:
+        """Returns the current hit/miss/eviction counters."""
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._data),
+                maxsize=self.maxsize,
+                weight=self._weight,
+            )
+
+    def _remove(self, key: K) -> None:
+        self._weight -= self._data.pop(key).weight
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            entry = self._data.get(key)  # type: ignore[call-overload]
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,208 @@
+import contextlib
+import ctypes
+import threading
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+
+from loguru import logger
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequestType
+
+_current_token: ContextVar["CancelToken | None"] = ContextVar(
+    "cancel_token", default=None
+)
+
+
+# Set once _rerun_pending() finds Streamlit's internals changed, to warn once.
+_internals_changed = False
+
+
+class RunInterrupted(BaseException):
+    """
+    Base class for errors that stop a run from outside the snippet. Derived
+    from BaseException, like KeyboardInterrupt, so that a snippet's
+    `except Exception` doesn't swallow them.
+    """
+
+
+class RunCancelled(RunInterrupted):
+    """Raised inside, or returned for, a run superseded by a newer one."""
+
+
+class CancelToken:
+    """
+    Cancellation flag for one run.
+
+    Backends either poll `cancelled` (the worker pool kills its process) or
+    wrap exec() in `interruptible()`, which lets cancel() raise the error
+    asynchronously in the executing thread. The exception is delivered at the
+    next bytecode boundary, so code blocked in a C call (e.g. time.sleep) is
+    only interrupted once the call returns.
+
+    Cancelling a token also cancels the tokens created with it as parent.
+    """
+
+    def __init__(self, parent: "CancelToken | None" = None):
+        self.error: RunInterrupted | None = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread_id: int | None = None
+        self._children: list[CancelToken] = []
+        if parent is not None:
+            parent._adopt(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, error: RunInterrupted | None = None) -> None:
+        """
+        Cancels the run. Safe to call repeatedly, e.g. if a snippet swallows
+        the exception; the first error given is the one that is kept.
+
+        Args:
+            error (RunInterrupted | None): What to report; RunCancelled if None.
+        """
+        with self._lock:
+            if self.error is None:
+                self.error = error or RunCancelled("Run was superseded by a newer one.")
+            self._event.set()
+            if self._thread_id is not None:
+                _set_async_exc(self._thread_id, type(self.error))
+            children = list(self._children)
+        for child in children:
+            child.cancel(self.error)
+
+    def _adopt(self, child: "CancelToken") -> None:
+        with self._lock:
+            self._children.append(child)
+            error = self.error
+        if error is not None:
+            child.cancel(error)
+
+    @contextlib.contextmanager
+    def interruptible(self) -> Iterator[None]:
+        """
+        Lets cancel() interrupt the calling thread while inside the block. The
+        bare exception raised asynchronously is replaced by the token's error.
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._thread_id = thread_id
+        try:
+            if self.cancelled:
+                raise self.error
+            yield
+        except RunInterrupted as e:
+            if self.error is None or e is self.error:
+                raise
+            raise self.error.with_traceback(e.__traceback__) from None
+        finally:
+            # A pending exception may be delivered while leaving; retry until
+            # no more can be scheduled. Any undelivered one is then replaced
+            # by _Drained and delivered here: clearing it with NULL instead
+            # leaves CPython's eval breaker set, which on 3.11 stops the
+            # thread's trace functions from seeing line events.
+            while True:
+                try:
+                    with self._lock:
+                        self._thread_id = None
+                        _set_async_exc(thread_id, _Drained)
+                    # Asynchronous exceptions are only raised between
+                    # bytecodes, so this loop has to keep executing some
+                    # until _Drained arrives. sleep(0) releases the GIL on
+                    # each pass instead of burning it.
+                    while True:
+                        time.sleep(0)
+                except _Drained:
+                    break
+                except RunInterrupted:
+                    continue
+
+
+class _Drained(Exception):
+    """Raised in a thread to consume a pending asynchronous exception."""
+
+
+def _set_async_exc(thread_id: int, exc_type: type[BaseException]) -> None:
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(thread_id), ctypes.py_object(exc_type)
+    )
+
+
+def current_cancel_token() -> CancelToken | None:
+    """Returns the token of the run in the current context, if it is cancellable."""
+    return _current_token.get()
+
+
+@contextlib.contextmanager
+def use_token(token: CancelToken) -> Iterator[CancelToken]:
+    """Makes token the current context's token inside the block."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def _rerun_pending(ctx) -> bool:
+    # ScriptRequests has no public accessor for a pending request, so this
+    # reads private state as laid out in Streamlit 1.51. Should a later
+    # release change it, no rerun is reported: superseded runs then go on
+    # until they finish or reach their budget, instead of the watchdog
+    # thread failing.
+    global _internals_changed
+    try:
+        requests = ctx.script_requests
+        state = requests._state
+        if state == ScriptRequestType.STOP:
+            return True
+        if state == ScriptRequestType.RERUN:
+            # Fragment reruns (e.g. paging a table) don't replace the whole run.
+            return not requests._rerun_data.fragment_id_queue
+    except AttributeError as e:
+        if not _internals_changed:
+            _internals_changed = True
+            logger.warning("Can't detect pending reruns in this Streamlit: {}", e)
+    return False
+
+
+@contextlib.contextmanager
+def cancel_on_rerun(poll_interval: float = 0.05) -> Iterator[CancelToken]:
+    """
+    Cancels the run made inside the block as soon as the session requests a
+    newer rerun, e.g. because the editor sent another debounced edit.
+
+    A watchdog thread polls the session's script requests; Streamlit itself
+    would only notice them at the next Streamlit call, which a long-running
+    snippet may never make.
+
+    Args:
+        poll_interval (float): Seconds between checks.
+
+    Yields:
+        CancelToken: The token backends consult while executing.
+    """
+    token = CancelToken()
+    ctx = get_script_run_ctx()
+    stop = threading.Event()
+
+    def watch() -> None:
+        while not stop.wait(poll_interval):
+            if _rerun_pending(ctx):
+                if not token.cancelled:
+                    logger.info("Cancelling run superseded by a newer rerun")
+                token.cancel()
+
+    watchdog = None
+    if ctx is not None:
+        watchdog = threading.Thread(target=watch, name="run-watchdog", daemon=True)
+        watchdog.start()
+    try:
+        with use_token(token):
+            yield token
+    finally:
+        stop.set()
+        if watchdog is not None:
+            watchdog.join()
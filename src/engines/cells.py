@@ -0,0 +1,100 @@
+import ast
+import re
+from dataclasses import dataclass, field
+
+CELL_MARKER = re.compile(r"^# %%.*$", re.MULTILINE)
+CELL_STATE_KEY = "cell_state"  # st.session_state key holding CellState per engine
+
+
+@dataclass(frozen=True, slots=True)
+class CellNames:
+    """Global names a cell reads and (re)binds."""
+
+    reads: frozenset[str] = frozenset()
+    writes: frozenset[str] = frozenset()
+
+
+@dataclass(slots=True)
+class CellState:
+    """A session's cell-mode namespace and what each cell last produced."""
+
+    namespace: dict = field(default_factory=dict)
+    digests: list[str] = field(default_factory=list)  # per cell, "" if not run
+    results: list = field(default_factory=list)  # per cell CapturedRun or None
+
+
+def split_cells(src: str) -> list[str]:
+    """
+    Splits source on `# %%` marker lines. Code before the first marker forms
+    its own cell; blank cells are dropped.
+
+    Args:
+        src (str): The snippet source.
+
+    Returns:
+        list[str]: The source of each cell, marker line included.
+    """
+    starts = [0] + [m.start() for m in CELL_MARKER.finditer(src)]
+    bounds = zip(starts, starts[1:] + [len(src)])
+    cells = [src[start:end] for start, end in bounds]
+    return [cell for cell in cells if CELL_MARKER.sub("", cell).strip()]
+
+
+def cell_names(tree: ast.Module) -> CellNames:
+    """
+    Collects the global names a parsed cell reads and writes.
+
+    The analysis is conservative: names used inside functions count as reads
+    of the cell, and mutating `x.attr` or `x[key]` counts as writing `x`.
+    """
+    reads: set[str] = set()
+    writes: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            (reads if isinstance(node.ctx, ast.Load) else writes).add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            writes.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != "*":
+                    writes.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Delete)):
+            if isinstance(node, (ast.Assign, ast.Delete)):
+                targets = node.targets
+            else:
+                targets = [node.target]
+            for target in targets:
+                if isinstance(node, ast.AugAssign) and isinstance(target, ast.Name):
+                    reads.add(target.id)
+                base = target
+                while isinstance(base, (ast.Attribute, ast.Subscript)):
+                    base = base.value
+                if base is not target and isinstance(base, ast.Name):
+                    writes.add(base.id)
+    return CellNames(reads=frozenset(reads), writes=frozenset(writes))
+
+
+def cells_to_run(
+    digests: list[str], names: list[CellNames], previous: list[str]
+) -> set[int]:
+    """
+    Decides which cells must execute: those whose source changed since they
+    last ran successfully, plus every later cell that reads a name written by
+    a cell that runs.
+
+    Args:
+        digests (list[str]): Source hash of each current cell.
+        names (list[CellNames]): Reads and writes of each current cell.
+        previous (list[str]): Hash of each cell as it last ran successfully.
+
+    Returns:
+        set[int]: Indexes of the cells to execute, in any order.
+    """
+    to_run: set[int] = set()
+    dirty_names: set[str] = set()
+    for i, (digest, cell) in enumerate(zip(digests, names)):
+        changed = i >= len(previous) or previous[i] != digest
+        if changed or cell.reads & dirty_names:
+            to_run.add(i)
+            dirty_names |= cell.writes
+    return to_run
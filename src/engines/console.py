@@ -0,0 +1,344 @@
+import contextlib
+import io
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from typing import TextIO
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+_stdout_target: ContextVar[TextIO | None] = ContextVar("stdout_target", default=None)
+_stderr_target: ContextVar[TextIO | None] = ContextVar("stderr_target", default=None)
+_install_lock = threading.Lock()
+_thread_start = threading.Thread.start
+
+
+class ConsoleLog(io.TextIOBase):
+    """
+    Append-only text stream holding a snippet's console output.
+
+    Output is stored UTF-8 encoded in a spooled temporary file: the first
+    `memory_limit` bytes stay in memory and anything beyond that is spilled
+    to disk, so server memory stays flat however much a snippet prints.
+    Readers fetch byte ranges (head, tail, pages) instead of the whole text.
+
+    Writes are collected in a small buffer and appended to the file in
+    `chunk_chars` blocks, since snippets tend to print many short lines.
+    """
+
+    def __init__(self, memory_limit: int = 1 << 20, chunk_chars: int = 65_536):
+        super().__init__()
+        self.memory_limit = memory_limit
+        self.chunk_chars = chunk_chars
+        self.id = uuid.uuid4().hex  # stable per log, e.g. for widget keys
+        self._file = tempfile.SpooledTemporaryFile(max_size=memory_limit, mode="w+b")
+        self._size = 0
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._chars = 0  # characters appended so far, including dropped ones
+        self._max_chars = sys.maxsize
+        self._on_exceeded: Callable[[], None] | None = None
+        self._lock = threading.Lock()
+
+    def limit(self, max_chars: int, on_exceeded: Callable[[], None]) -> None:
+        """
+        Caps the log at max_chars characters. Output beyond that is dropped and
+        on_exceeded is called once. The limit is checked whenever buffered
+        writes are appended, so it adds nothing to each write and may let up
+        to `chunk_chars` more characters through before on_exceeded runs.
+
+        Args:
+            max_chars (int): Characters to keep.
+            on_exceeded (Callable[[], None]): Called when more were written.
+        """
+        with self._lock:
+            self._max_chars = max_chars
+            self._on_exceeded = on_exceeded
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._pending.append(text)
+            self._pending_chars += len(text)
+            if self._pending_chars >= self.chunk_chars:
+                self._drain()
+        return len(text)
+
+    def _drain(self) -> None:
+        # Caller holds the lock.
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._pending_chars = 0
+        room = self._max_chars - self._chars
+        self._chars += len(text)
+        if room > 0:
+            data = text[:room].encode("utf-8", errors="replace")
+            self._file.write(data)
+            self._size += len(data)
+        if room >= 0 and self._chars > self._max_chars and self._on_exceeded:
+            # Last, since it may raise asynchronously in this thread.
+            self._on_exceeded()
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+    @property
+    def size(self) -> int:
+        """Total bytes written."""
+        with self._lock:
+            self._drain()
+            return self._size
+
+    @property
+    def spilled(self) -> bool:
+        """Whether part of the log lives on disk."""
+        return self.size > self.memory_limit
+
+    def read_range(self, offset: int, length: int) -> str:
+        """
+        Reads part of the log.
+
+        Args:
+            offset (int): Byte offset to start at.
+            length (int): Maximum number of bytes to read.
+
+        Returns:
+            str: The decoded text; characters cut at the edges are replaced.
+        """
+        with self._lock:
+            self._drain()
+            self._file.seek(max(offset, 0))
+            data = self._file.read(max(length, 0))
+            self._file.seek(0, io.SEEK_END)
+        return data.decode("utf-8", errors="replace")
+
+    def head(self, length: int) -> str:
+        """Returns the first `length` bytes of output."""
+        return self.read_range(0, length)
+
+    def tail(self, length: int) -> str:
+        """Returns the last `length` bytes of output."""
+        return self.read_range(self.size - length, length)
+
+    def getvalue(self) -> str:
+        """Returns the whole log. Avoid on logs that may have spilled."""
+        return self.read_range(0, self.size)
+
+    def gzipped(self, chunk_size: int = 1 << 20) -> bytes:
+        """Returns the whole log gzip-compressed, reading it chunk by chunk."""
+        compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+        parts = []
+        for offset in range(0, self.size, chunk_size):
+            with self._lock:
+                self._file.seek(offset)
+                chunk = self._file.read(chunk_size)
+                self._file.seek(0, io.SEEK_END)
+            parts.append(compressor.compress(chunk))
+        parts.append(compressor.flush())
+        return b"".join(parts)
+
+
+class StreamingConsole(io.TextIOBase):
+    """
+    Text stream that writes console output to a ConsoleLog and periodically
+    renders it.
+
+    Writes are batched: the render callback is invoked at most once per
+    `flush_interval` seconds, or sooner once `flush_bytes` characters are
+    pending, so a chatty snippet doesn't flood the websocket. Output still
+    pending when the snippet goes quiet (e.g. blocks in time.sleep) is
+    rendered by a timer once the interval is up.
+
+    Renders happen on the thread that created the console, or on the timer
+    thread, which is attached to the same script run; never on threads a
+    snippet starts itself. Closing the stream stops the timer.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[], None],
+        log: ConsoleLog,
+        flush_interval: float = 0.25,
+        flush_bytes: int = 8192,
+    ):
+        super().__init__()
+        self._render = render
+        self.log = log
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+
+        self._pending_chars = 0
+        self._last_flush = 0.0
+        self._owner = threading.get_ident()
+        self._ctx = get_script_run_ctx(suppress_warning=True)
+        self._timer: threading.Timer | None = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self.log.write(text)
+        # Unlocked: a lost update from a snippet's own thread only delays a flush.
+        self._pending_chars += len(text)
+        due = (
+            self._pending_chars >= self.flush_bytes
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+        if due and threading.get_ident() == self._owner:
+            self._flush()
+        else:
+            self._schedule_flush()
+        return len(text)
+
+    def close(self) -> None:
+        # IOBase calls flush() from close() and __del__; by then the owner
+        # renders the final output, which a late live render would replace.
+        with self._lock:
+            self._stopped = True
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        with self._render_lock:  # wait for a timer render in progress
+            self._pending_chars = 0
+        super().close()
+
+    def flush(self) -> None:
+        if threading.get_ident() == self._owner:
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._render_lock:
+            with self._lock:
+                if not self._pending_chars or self._stopped:
+                    return
+                self._pending_chars = 0
+                self._last_flush = time.monotonic()
+            self._render()
+
+    def _schedule_flush(self) -> None:
+        # The first render, which creates the output's place on the page, is
+        # left to the owner.
+        if self._ctx is None or not self._last_flush:
+            return
+        with self._lock:
+            if self._timer is not None or self._stopped:
+                return
+            delay = self._last_flush + self.flush_interval - time.monotonic()
+            self._timer = threading.Timer(max(delay, 0.0), self._flush_from_timer)
+            self._timer.daemon = True
+            add_script_run_ctx(self._timer, self._ctx)
+            self._timer.start()
+
+    def _flush_from_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self._flush()
+
+
+class _StreamRouter(io.TextIOBase):
+    """
+    Stand-in for sys.stdout/sys.stderr that forwards each write to the stream
+    captured by the current context, or to the original stream otherwise.
+    """
+
+    def __init__(self, target: ContextVar[TextIO | None], fallback: TextIO):
+        super().__init__()
+        self._target = target
+        self._fallback = fallback
+
+    def _current(self) -> TextIO:
+        stream = _capture_target(self._target)
+        return stream if stream is not None else self._fallback
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return self._current().write(text)
+
+    def flush(self) -> None:
+        self._current().flush()
+
+    def isatty(self) -> bool:
+        return self._current().isatty()
+
+    def fileno(self) -> int:
+        return self._fallback.fileno()
+
+    @property
+    def encoding(self) -> str:
+        return getattr(self._current(), "encoding", None) or "utf-8"
+
+
+def _capture_target(target: ContextVar[TextIO | None]) -> TextIO | None:
+    """
+    Returns the stream the current context captures to, or else the one
+    inherited by the current thread from the thread that started it.
+    """
+    stream = target.get()
+    if stream is None:
+        inherited = getattr(threading.current_thread(), "_capture_targets", None)
+        stream = inherited.get(target) if inherited else None
+    return stream
+
+
+def _start_capturing(thread: threading.Thread) -> None:
+    # Threads start in a fresh context; hand them the starting thread's
+    # capture, so prints from e.g. a snippet's ThreadPoolExecutor are kept.
+    targets = {
+        target: _capture_target(target) for target in (_stdout_target, _stderr_target)
+    }
+    if any(targets.values()):
+        thread._capture_targets = targets
+    _thread_start(thread)
+
+
+def install_stream_routers() -> None:
+    """
+    Replaces sys.stdout and sys.stderr with context-aware routers, and makes
+    new threads inherit the capture of the thread starting them, once.
+    """
+    with _install_lock:
+        if not isinstance(sys.stdout, _StreamRouter):
+            sys.stdout = _StreamRouter(_stdout_target, sys.stdout)
+        if not isinstance(sys.stderr, _StreamRouter):
+            sys.stderr = _StreamRouter(_stderr_target, sys.stderr)
+        threading.Thread.start = _start_capturing
+
+
+@contextlib.contextmanager
+def capture_output(stdout: TextIO, stderr: TextIO | None = None) -> Iterator[None]:
+    """
+    Routes prints made in the current context to stdout (and stderr).
+
+    Unlike contextlib.redirect_stdout, this doesn't swap the process-global
+    stream, so sessions running snippets concurrently on different script
+    threads each capture only their own output. Threads started inside the
+    block capture to the same streams for as long as they run.
+
+    Args:
+        stdout (TextIO): Stream receiving standard output.
+        stderr (TextIO | None): Stream receiving standard error, if captured.
+    """
+    install_stream_routers()
+    out_token = _stdout_target.set(stdout)
+    err_token = _stderr_target.set(stderr) if stderr is not None else None
+    try:
+        yield
+    finally:
+        if err_token is not None:
+            _stderr_target.reset(err_token)
+        _stdout_target.reset(out_token)
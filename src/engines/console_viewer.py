@@ -0,0 +1,69 @@
+import streamlit as st
+
+from settings import settings
+
+from .console import ConsoleLog
+
+
+def show_console_log(log: ConsoleLog, live: bool = False) -> None:
+    """
+    Renders console output without sending all of it to the browser.
+
+    Short logs are shown whole. Longer ones show their head and tail, with
+    the pages in between fetched on demand and a download of the full log.
+
+    Args:
+        log (ConsoleLog): The captured output.
+        live (bool): Whether the snippet is still running; only the tail is
+            shown and no widgets are created, since this is re-rendered on
+            every flush.
+    """
+    page_bytes = settings.console_page_bytes
+    if live:
+        st.code(log.tail(settings.console_tail_chars), language="text", wrap_lines=True)
+    elif log.size <= 2 * page_bytes:
+        st.code(log.getvalue(), language="text", wrap_lines=True)
+    else:
+        _show_paged_log(log, page_bytes)
+
+
+@st.fragment
+def _show_paged_log(log: ConsoleLog, page_bytes: int) -> None:
+    # A fragment, so paging doesn't re-run the snippet that produced the log.
+    pages = -(-log.size // page_bytes)
+    st.code(log.head(page_bytes), language="text", wrap_lines=True)
+
+    if pages > 2 and st.toggle(
+        f"Browse {pages - 2:,} more pages", key=f"console-{log.id}-browse"
+    ):
+        page = st.number_input(
+            "Page",
+            min_value=2,
+            max_value=pages - 1,
+            key=f"console-{log.id}-page",
+        )
+        offset = (page - 1) * page_bytes
+        st.code(log.read_range(offset, page_bytes), language="text", wrap_lines=True)
+
+    st.caption(f"… last {page_bytes:,} of {log.size:,} bytes")
+    st.code(log.tail(page_bytes), language="text", wrap_lines=True)
+
+    if not log.spilled:
+        st.download_button(
+            "Download full log",
+            log.getvalue(),
+            file_name="console.log",
+            mime="text/plain",
+            key=f"console-{log.id}-download",
+            on_click="ignore",
+        )
+    elif st.button("Prepare full log download", key=f"console-{log.id}-prepare"):
+        # Compressed on request only; spilled logs can be far larger than memory.
+        st.download_button(
+            "Download full log (.gz)",
+            log.gzipped(),
+            file_name="console.log.gz",
+            mime="application/gzip",
+            key=f"console-{log.id}-download",
+            on_click="ignore",
+        )
@@ -0,0 +1,148 @@
+import ast
+import contextlib
+import io
+import uuid
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+DISPLAY_HOOK = "__display__"  # global the last expression of a snippet is passed to
+
+_display_target: ContextVar[Callable[[object], None] | None] = ContextVar(
+    "display_target", default=None
+)
+
+
+@dataclass(frozen=True, slots=True)
+class TableOutput:
+    """A DataFrame or array displayed by a snippet, kept as an Arrow table."""
+
+    table: "pa.Table"
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+def display(*objs: object) -> None:
+    """
+    Shows objects below the snippet's console output, like IPython's display().
+    DataFrames, Series and NumPy arrays become sortable, paginated tables;
+    anything else is printed as its repr().
+    """
+    target = _display_target.get()
+    for obj in objs:
+        if target is None:
+            print(repr(obj))
+        else:
+            target(obj)
+
+
+def display_result(value: object) -> None:
+    """Displays the value of a snippet's last expression unless it is None."""
+    if value is not None:
+        display(value)
+
+
+@contextlib.contextmanager
+def capture_display(target: Callable[[object], None]) -> Iterator[None]:
+    """Routes display() calls made in the current context to target."""
+    token = _display_target.set(target)
+    try:
+        yield
+    finally:
+        _display_target.reset(token)
+
+
+class DisplayCapture:
+    """display() target that collects tables and prints everything else."""
+
+    def __init__(self):
+        self.tables: list[TableOutput] = []
+
+    def __call__(self, obj: object) -> None:
+        table = to_table(obj)
+        if table is None:
+            print(repr(obj))
+        else:
+            self.tables.append(TableOutput(table))
+
+
+def to_table(obj: object) -> "pa.Table | None":
+    """
+    Converts a DataFrame, Series or 1-/2-D NumPy array to an Arrow table.
+
+    Returns:
+        pa.Table | None: The table, or None if obj isn't tabular or can't be
+            represented in Arrow.
+    """
+    module = type(obj).__module__.partition(".")[0]
+    if module not in ("pandas", "numpy", "pyarrow"):
+        return None
+
+    import pyarrow as pa
+
+    if isinstance(obj, pa.Table):
+        return obj
+    try:
+        if module == "numpy":
+            if getattr(obj, "ndim", None) == 1:
+                return pa.table({"0": obj})
+            if getattr(obj, "ndim", None) == 2:
+                return pa.table({str(i): obj[:, i] for i in range(obj.shape[1])})
+            return None
+
+        import pandas as pd
+
+        if isinstance(obj, pd.Series):
+            obj = obj.to_frame()
+        if isinstance(obj, pd.DataFrame):
+            # Arrow needs string column names, e.g. for frames built from arrays.
+            return pa.Table.from_pandas(obj.rename(columns=str))
+    except (pa.ArrowException, TypeError, ValueError):
+        pass
+    return None
+
+
+def table_to_ipc(table: "pa.Table") -> bytes:
+    """Serializes a table in the Arrow IPC stream format."""
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def table_to_csv(table: "pa.Table") -> str:
+    """Formats a table as CSV text with a header row, for headless output."""
+    import pyarrow.csv
+
+    sink = io.BytesIO()
+    pyarrow.csv.write_csv(table, sink)
+    return sink.getvalue().decode()
+
+
+def table_from_ipc(data: bytes) -> "pa.Table":
+    """Reads a table written by table_to_ipc()."""
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(data).read_all()
+
+
+def display_last_expression(tree: ast.Module) -> ast.Module:
+    """
+    Rewrites a module so that the value of a trailing expression statement is
+    passed to the DISPLAY_HOOK global, as a notebook would show it.
+    """
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = tree.body[-1]
+        call = ast.Call(
+            func=ast.Name(id=DISPLAY_HOOK, ctx=ast.Load()),
+            args=[last.value],
+            keywords=[],
+        )
+        tree.body[-1] = ast.copy_location(ast.Expr(value=call), last)
+        ast.fix_missing_locations(tree)
+    return tree
@@ -0,0 +1,97 @@
+import asyncio
+import inspect
+import threading
+from collections.abc import Callable
+from types import CodeType
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from .cancellation import RunInterrupted
+
+EVENT_LOOP_KEY = "event_loop"
+WAKE_UP_INTERVAL = 0.05  # seconds; bounds how long cancellation can be delayed
+CANCEL_GRACE = 1.0  # seconds leftover tasks get to finish once cancelled
+
+_thread_loops = threading.local()
+_abandoned_tasks: set[asyncio.Task] = set()
+
+
+def session_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the event loop owned by the current Streamlit session, creating it
+    on first use. Outside a session (worker processes, the startup warm-up)
+    each thread owns one instead.
+
+    The loop is reused by every run of the session, so connections opened by
+    `async_http_client` stay alive between reruns. It only runs while a
+    snippet is awaiting something, on the thread executing the snippet.
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        loop = getattr(_thread_loops, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = _thread_loops.loop = asyncio.new_event_loop()
+        return loop
+
+    loop = st.session_state.get(EVENT_LOOP_KEY)
+    if loop is None or loop.is_closed():
+        loop = st.session_state[EVENT_LOOP_KEY] = asyncio.new_event_loop()
+    return loop
+
+
+def exec_snippet(code: CodeType, namespace: dict) -> None:
+    """
+    Executes compiled snippet code in namespace. Code compiled with top-level
+    `await` evaluates to a coroutine, which is run to completion on the
+    session's event loop; tasks it leaves behind are cancelled. A loop whose
+    tasks ignore cancellation is closed, and the next run gets a new one.
+    Responses of the shared HTTP clients still open afterwards free their
+    per-host slots.
+    """
+    # Loaded with the execution globals anyway, which inject the clients.
+    from .http_client import release_host_slots
+
+    with release_host_slots():
+        if not code.co_flags & inspect.CO_COROUTINE:
+            exec(code, namespace, None)
+            return
+
+        loop = session_event_loop()
+        task = loop.create_task(eval(code, namespace, None))
+        stop_waking = _wake_up_periodically(loop)
+        try:
+            loop.run_until_complete(task)
+        finally:
+            stop_waking()
+            _cancel_pending(loop)
+
+
+def _wake_up_periodically(loop: asyncio.AbstractEventLoop) -> Callable[[], None]:
+    # An exception raised asynchronously by a cancel token is only delivered
+    # once the loop's selector returns, so don't let it block for long.
+    handle = None
+
+    def wake_up() -> None:
+        nonlocal handle
+        handle = loop.call_later(WAKE_UP_INTERVAL, wake_up)
+
+    wake_up()
+    return lambda: handle.cancel()
+
+
+def _cancel_pending(loop: asyncio.AbstractEventLoop) -> None:
+    tasks = asyncio.all_tasks(loop)
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    try:
+        loop.run_until_complete(asyncio.wait(tasks, timeout=CANCEL_GRACE))
+    except (Exception, RunInterrupted):
+        pass  # e.g. a second cancellation arriving while cleaning up
+    if any(not task.done() for task in tasks):
+        # Snippet code swallowed the cancellation; don't let it run again. Its
+        # tasks are kept alive: finalizing a coroutine that also swallows
+        # GeneratorExit can spin forever outside a running loop.
+        loop.close()
+        _abandoned_tasks.update(task for task in tasks if not task.done())
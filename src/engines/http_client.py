@@ -0,0 +1,702 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from email.utils import parsedate_to_datetime
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from pathlib import Path
+from typing import NamedTuple
+
+import httpx
+from loguru import logger
+
+from settings import settings
+
+HTTP_TIMEOUT = 20.0  # seconds
+SLOT_POLL_INTERVAL = 0.05  # seconds; lets a cancelled run stop waiting for a host
+ASYNC_SLOT_POLL_INTERVAL = 0.01  # seconds between an async request's checks
+# Status codes cacheable by default, i.e. with heuristic freshness (RFC 9110 §15.1)
+HEURISTIC_STATUS = frozenset({200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501})
+HEURISTIC_FRACTION = 0.1  # of the time since Last-Modified (RFC 9111 §4.2.2)
+MAX_ENTRY_SHARE = 0.125  # largest response stored, as a share of the cache size
+EVICT_TO = 0.9  # eviction frees space down to this share of the cache size
+UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+# Not stored, or not taken from a 304 (RFC 9111 §3.1, §3.2)
+HOP_BY_HOP_HEADERS = frozenset(
+    {"connection", "keep-alive", "proxy-connection", "te", "trailer", "upgrade"}
+)
+NOT_UPDATED_HEADERS = frozenset(
+    {"content-length", "content-encoding", "transfer-encoding"}
+)
+
+
+def _directives(headers: httpx.Headers) -> dict[str, str | None]:
+    """Parses Cache-Control into {directive: argument or None}."""
+    directives = {}
+    for item in headers.get_list("cache-control", split_commas=True):
+        name, _, arg = item.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _seconds(value: str | None) -> float | None:
+    try:
+        return max(float(int(value)), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _http_date(value: str | None) -> float | None:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    """A stored response plus what's needed to compute its age (RFC 9111 §4.2.3)."""
+
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    request_time: float
+    response_time: float
+    vary: dict[str, str] = field(default_factory=dict)  # request headers it varies on
+
+    @property
+    def header_map(self) -> httpx.Headers:
+        return httpx.Headers(self.headers)
+
+    def age(self, now: float) -> float:
+        headers = self.header_map
+        date = _http_date(headers.get("date"))
+        apparent_age = max(self.response_time - date, 0.0) if date else 0.0
+        response_delay = self.response_time - self.request_time
+        corrected_age = (_seconds(headers.get("age")) or 0.0) + response_delay
+        return max(apparent_age, corrected_age) + (now - self.response_time)
+
+    def freshness_lifetime(self) -> float:
+        headers = self.header_map
+        directives = _directives(headers)
+        for name in ("s-maxage", "max-age"):  # s-maxage: we are a shared cache
+            if name in directives:
+                return _seconds(directives[name]) or 0.0
+        date = _http_date(headers.get("date")) or self.response_time
+        if "expires" in headers:
+            expires = _http_date(headers["expires"])  # invalid means expired
+            return max(expires - date, 0.0) if expires else 0.0
+        last_modified = _http_date(headers.get("last-modified"))
+        if last_modified and self.status in HEURISTIC_STATUS:
+            return max(date - last_modified, 0.0) * HEURISTIC_FRACTION
+        return 0.0
+
+    def is_fresh(self, request: httpx.Request, now: float) -> bool:
+        """Whether this may be served for request without revalidation."""
+        request_directives = _directives(request.headers)
+        directives = _directives(self.header_map)
+        if "no-cache" in request_directives or "no-cache" in directives:
+            return False
+        age = self.age(now)
+        lifetime = self.freshness_lifetime()
+        max_age = _seconds(request_directives.get("max-age"))
+        if max_age is not None and age > max_age:
+            return False
+        min_fresh = _seconds(request_directives.get("min-fresh")) or 0.0
+        if lifetime - age >= min_fresh and age < lifetime:
+            return True
+        if "max-stale" in request_directives and not (
+            "must-revalidate" in directives or "proxy-revalidate" in directives
+        ):
+            max_stale = _seconds(request_directives["max-stale"])
+            return max_stale is None or age - lifetime <= max_stale
+        return False
+
+    def to_response(self, request: httpx.Request, now: float) -> httpx.Response:
+        headers = self.header_map
+        headers["age"] = str(int(self.age(now)))
+        return httpx.Response(
+            self.status,
+            headers=headers,
+            content=self.body,  # still content-encoded, httpx decodes it
+            request=request,
+            extensions={"from_cache": True},
+        )
+
+
+class HTTPCache:
+    """
+    Shared HTTP cache (RFC 9111) storing GET responses in a directory.
+
+    Being shared by every session, it follows the rules for shared caches:
+    `private` responses and responses to requests with credentials are not
+    stored, and `s-maxage` takes precedence over `max-age`. Stale responses
+    with validators are revalidated with conditional requests. Each URL keeps
+    one variant; a request whose `Vary` headers differ is a miss.
+
+    Files are evicted least recently used first once the directory exceeds
+    `max_bytes`. Worker processes share the directory, so the size is only
+    tracked approximately and re-measured whenever eviction runs.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = sum(size for _, _, size in self._scan())
+
+    def lookup(self, request: httpx.Request) -> "_Lookup":
+        """
+        Decides how to serve request.
+
+        Returns:
+            _Lookup: A response served from the cache, or the request to send
+                (conditional if a stale entry has validators) and that entry.
+        """
+        url = str(request.url)
+        if request.method in UNSAFE_METHODS:
+            self.delete(url)  # RFC 9111 §4.4
+            return _Lookup(None, request, None)
+        if request.method != "GET" or "no-store" in _directives(request.headers):
+            return _Lookup(None, request, None)
+
+        entry = self.get(url)
+        if entry is not None and any(
+            request.headers.get(name, "") != value for name, value in entry.vary.items()
+        ):
+            entry = None
+        now = time.time()
+        if entry is not None and entry.is_fresh(request, now):
+            return _Lookup(entry.to_response(request, now), request, entry)
+        if "only-if-cached" in _directives(request.headers):
+            return _Lookup(httpx.Response(504, request=request), request, entry)
+        if entry is None:
+            return _Lookup(None, request, None)
+
+        headers = entry.header_map
+        conditional = request.headers.copy()
+        if "etag" in headers:
+            conditional["if-none-match"] = headers["etag"]
+        if "last-modified" in headers:
+            conditional["if-modified-since"] = headers["last-modified"]
+        if conditional == request.headers:
+            return _Lookup(None, request, None)  # nothing to revalidate with
+        return _Lookup(
+            None,
+            httpx.Request(
+                request.method,
+                request.url,
+                headers=conditional,
+                extensions=request.extensions,
+            ),
+            entry,
+        )
+
+    def wants_body(
+        self, request: httpx.Request, response: httpx.Response, entry
+    ) -> bool:
+        """Whether response has to be read so that it can be stored."""
+        if request.method != "GET":
+            return False
+        if response.status_code == 304:
+            return entry is not None
+        directives = _directives(response.headers)
+        if "no-store" in directives or "private" in directives:
+            return False
+        if "no-store" in _directives(request.headers):
+            return False
+        if response.headers.get("vary", "").strip() == "*":
+            return False
+        if "authorization" in request.headers and not (
+            {"public", "s-maxage", "must-revalidate"} & directives.keys()
+        ):
+            return False
+        length = response.headers.get("content-length")
+        if length and length.isdigit() and int(length) > self.max_entry_bytes:
+            return False
+        explicit = {"max-age", "s-maxage", "public"} & directives.keys()
+        return response.status_code in HEURISTIC_STATUS and bool(
+            explicit or {"expires", "etag", "last-modified"} & response.headers.keys()
+        )
+
+    def complete(
+        self,
+        request: httpx.Request,
+        response: httpx.Response,
+        body: bytes,
+        entry: CachedResponse | None,
+        request_time: float,
+    ) -> httpx.Response:
+        """Stores a response read because of wants_body() and returns it."""
+        now = time.time()
+        if response.status_code == 304 and entry is not None:
+            headers = entry.header_map
+            for name, value in response.headers.multi_items():
+                if name not in NOT_UPDATED_HEADERS:
+                    headers[name] = value
+            entry = replace(
+                entry,
+                headers=headers.multi_items(),
+                request_time=request_time,
+                response_time=now,
+            )
+            self.put(str(request.url), entry)
+            return entry.to_response(request, now)
+
+        entry = CachedResponse(
+            status=response.status_code,
+            headers=[
+                (name, value)
+                for name, value in response.headers.multi_items()
+                if name not in HOP_BY_HOP_HEADERS and name != "transfer-encoding"
+            ],
+            body=body,
+            request_time=request_time,
+            response_time=now,
+            vary={
+                name.strip().lower(): request.headers.get(name.strip(), "")
+                for name in response.headers.get("vary", "").split(",")
+                if name.strip()
+            },
+        )
+        if len(body) <= self.max_entry_bytes:
+            self.put(str(request.url), entry)
+        return httpx.Response(
+            entry.status,
+            headers=entry.headers,
+            content=body,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    @property
+    def max_entry_bytes(self) -> int:
+        return int(self.max_bytes * MAX_ENTRY_SHARE)
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Returns the entry stored for url, if any, marking it recently used."""
+        path = self._path(url)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        meta, _, body = data.partition(b"\n")
+        try:
+            fields = json.loads(meta)
+        except ValueError:
+            return None
+        fields["headers"] = [tuple(h) for h in fields["headers"]]
+        return CachedResponse(body=body, **fields)
+
+    def put(self, url: str, entry: CachedResponse) -> None:
+        """Stores entry for url, evicting old entries if the cache is full."""
+        meta = {
+            "status": entry.status,
+            "headers": entry.headers,
+            "request_time": entry.request_time,
+            "response_time": entry.response_time,
+            "vary": entry.vary,
+        }
+        data = json.dumps(meta).encode() + b"\n" + entry.body
+        path = self._path(url)
+        try:
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, prefix=".tmp-", delete=False
+            ) as f:
+                f.write(data)
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning("HTTP cache could not store {}: {}", url, e)
+            return
+        with self._lock:
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete(self, url: str) -> None:
+        try:
+            self._path(url).unlink()
+        except OSError:
+            pass
+
+    def _path(self, url: str) -> Path:
+        return self.directory / hashlib.sha256(url.encode()).hexdigest()
+
+    def _scan(self) -> list[tuple[float, Path, int]]:
+        files = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, Path(entry.path), stat.st_size))
+        return files
+
+    def _evict(self) -> None:
+        # Caller holds the lock.
+        files = sorted(self._scan())
+        size = sum(size for _, _, size in files)
+        for _, path, file_size in files:
+            if size <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= file_size
+        self._size = size
+
+
+class _Lookup(NamedTuple):
+    response: httpx.Response | None
+    request: httpx.Request
+    entry: CachedResponse | None
+
+
+class CachingTransport(httpx.BaseTransport):
+    """Serves requests from an HTTPCache, passing misses on to transport."""
+
+    def __init__(self, transport: httpx.BaseTransport, cache: HTTPCache):
+        self._transport = transport
+        self._cache = cache
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        lookup = self._cache.lookup(request)
+        if lookup.response is not None:
+            return lookup.response
+        request_time = time.time()
+        response = self._transport.handle_request(lookup.request)
+        if not self._cache.wants_body(request, response, lookup.entry):
+            return response
+        try:
+            body = b"".join(response.iter_raw())
+        finally:
+            response.close()
+        return self._cache.complete(request, response, body, lookup.entry, request_time)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of CachingTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: HTTPCache):
+        self._transport = transport
+        self._cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        lookup = self._cache.lookup(request)
+        if lookup.response is not None:
+            return lookup.response
+        request_time = time.time()
+        response = await self._transport.handle_async_request(lookup.request)
+        if not self._cache.wants_body(request, response, lookup.entry):
+            return response
+        try:
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await response.aclose()
+        return self._cache.complete(request, response, body, lookup.entry, request_time)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        _hold_until_run_ends(self, release)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+    def abandon(self) -> None:
+        self.close()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        _hold_until_run_ends(self, release)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+    def abandon(self) -> None:
+        # The run's event loop has stopped, so the stream can't be closed.
+        self._release()
+
+
+# Streams holding a host slot in the current run; see release_host_slots().
+_run_streams: ContextVar["weakref.WeakSet | None"] = ContextVar(
+    "run_streams", default=None
+)
+
+
+def _hold_until_run_ends(stream, release: Callable[[], None]) -> None:
+    # The slot is also freed if the response is garbage-collected unclosed.
+    weakref.finalize(stream, release)
+    streams = _run_streams.get()
+    if streams is not None:
+        streams.add(stream)
+
+
+@contextlib.contextmanager
+def release_host_slots() -> Iterator[None]:
+    """
+    Frees the per-host slots of responses that are still open when the block
+    exits, e.g. responses a snippet streamed and never closed, so they don't
+    hold back other sessions' requests to the host.
+    """
+    streams = weakref.WeakSet()
+    reset = _run_streams.set(streams)
+    try:
+        yield
+    finally:
+        _run_streams.reset(reset)
+        for stream in list(streams):
+            with contextlib.suppress(Exception):
+                stream.abandon()
+
+
+class _HostSlots:
+    """
+    Process-wide limit of concurrent requests per host. A request waiting for
+    a slot gives up with httpx.PoolTimeout after its `pool` timeout.
+    """
+
+    def __init__(self, per_host: int):
+        self._per_host = per_host
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, request: httpx.Request) -> Callable[[], None]:
+        """Waits for a slot; returns the function that releases it."""
+        slots, deadline = self._slots_for(request)
+        # Waits in short steps, so that a run's cancellation reaches it.
+        while not slots.acquire(timeout=SLOT_POLL_INTERVAL):
+            self._check_deadline(request, deadline)
+        return _once(slots.release)
+
+    async def acquire_async(self, request: httpx.Request) -> Callable[[], None]:
+        """Like acquire(), without blocking the event loop."""
+        slots, deadline = self._slots_for(request)
+        while not slots.acquire(blocking=False):
+            self._check_deadline(request, deadline)
+            await asyncio.sleep(ASYNC_SLOT_POLL_INTERVAL)
+        return _once(slots.release)
+
+    def _slots_for(
+        self, request: httpx.Request
+    ) -> tuple[threading.BoundedSemaphore, float | None]:
+        with self._lock:
+            slots = self._slots.setdefault(
+                request.url.netloc.decode(), threading.BoundedSemaphore(self._per_host)
+            )
+        timeout = request.extensions.get("timeout", {}).get("pool")
+        return slots, None if timeout is None else time.monotonic() + timeout
+
+    def _check_deadline(self, request: httpx.Request, deadline: float | None) -> None:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise httpx.PoolTimeout(
+                f"All {self._per_host} connections to {request.url.host} are busy.",
+                request=request,
+            )
+
+
+class HostLimitedTransport(httpx.BaseTransport):
+    """
+    Allows at most `per_host` requests to one host at a time, counting a
+    request until its response is closed, garbage-collected or left open at
+    the end of the run (see release_host_slots()).
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, per_host: int):
+        self._transport = transport
+        self._slots = _HostSlots(per_host)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        release = self._slots.acquire(request)
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncHostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of HostLimitedTransport. Its per-host limit holds across
+    event loops, i.e. across sessions, but it keeps one connection pool per
+    loop, since asyncio connections can't be used from another loop.
+    """
+
+    def __init__(self, factory: Callable[[], httpx.AsyncBaseTransport], per_host: int):
+        self._factory = factory
+        self._slots = _HostSlots(per_host)
+        self._transports: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncBaseTransport
+        ] = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        if loop not in self._transports:
+            self._transports[loop] = self._factory()
+        transport = self._transports[loop]
+        release = await self._slots.acquire_async(request)
+        try:
+            response = await transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _AsyncReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def _once(func: Callable[[], None]) -> Callable[[], None]:
+    called = False
+
+    def wrapper() -> None:
+        nonlocal called
+        if not called:
+            called = True
+            func()
+
+    return wrapper
+
+
+class _SharedClient(httpx.Client):
+    """A client shared by every snippet: closing it is a no-op."""
+
+    def __enter__(self) -> "_SharedClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _SharedAsyncClient(httpx.AsyncClient):
+    """An async client shared by every snippet: closing it is a no-op."""
+
+    async def __aenter__(self) -> "_SharedAsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+
+def _client_options() -> dict:
+    return {
+        "timeout": HTTP_TIMEOUT,
+        "follow_redirects": True,
+        # Sessions share the client, so they mustn't share cookies.
+        "cookies": CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    }
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=settings.http_max_connections)
+
+
+_http_cache: HTTPCache | None = None
+_http_client: httpx.Client | None = None
+_async_http_client: httpx.AsyncClient | None = None
+_clients_lock = threading.Lock()
+
+
+def _get_http_cache() -> HTTPCache | None:
+    # Caller holds _clients_lock.
+    global _http_cache
+    if _http_cache is None and settings.http_cache:
+        directory = settings.http_cache_dir or os.path.join(
+            tempfile.gettempdir(), "piece-of-code-http-cache"
+        )
+        _http_cache = HTTPCache(Path(directory), settings.http_cache_max_bytes)
+    return _http_cache
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Returns the process-wide client injected into snippets as `http_client`.
+
+    Requests share its keep-alive connection pool, are limited to
+    `APP_HTTP_MAX_CONNECTIONS_PER_HOST` at a time per host and are answered
+    from the shared on-disk HTTP cache when allowed.
+    """
+    global _http_client
+    with _clients_lock:
+        if _http_client is None:
+            transport: httpx.BaseTransport = HostLimitedTransport(
+                httpx.HTTPTransport(limits=_limits()),
+                settings.http_max_connections_per_host,
+            )
+            cache = _get_http_cache()
+            if cache is not None:
+                transport = CachingTransport(transport, cache)
+            _http_client = _SharedClient(transport=transport, **_client_options())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide client injected into snippets as
+    `async_http_client`, the async counterpart of get_http_client(). It may
+    be used from any event loop; each loop gets its own connection pool.
+    """
+    global _async_http_client
+    with _clients_lock:
+        if _async_http_client is None:
+            transport: httpx.AsyncBaseTransport = AsyncHostLimitedTransport(
+                lambda: httpx.AsyncHTTPTransport(limits=_limits()),
+                settings.http_max_connections_per_host,
+            )
+            cache = _get_http_cache()
+            if cache is not None:
+                transport = AsyncCachingTransport(transport, cache)
+            _async_http_client = _SharedAsyncClient(
+                transport=transport, **_client_options()
+            )
+        return _async_http_client
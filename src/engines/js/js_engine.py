@@ -1,10 +1,12 @@
 from pathlib import Path
 
 import streamlit as st
-import streamlit.components.v1 as components
 from streamlit.delta_generator import DeltaGenerator
 
-from ..base_engine import BaseEngine
+from ..base_engine import BaseEngine, HeadlessResult, RunOptions
+from ..console import ConsoleLog
+from ..preview_server import show_html
+from ..warm_cache import WARM_CACHE
 
 
 class JSEngine(BaseEngine):
@@ -14,20 +16,52 @@ class JSEngine(BaseEngine):
     def language(self) -> str:
         return "html"
 
-    def run(self, code: str, container: DeltaGenerator) -> None:
+    def render_html(self, code: str) -> str:
+        """Returns the HTML document to render; the code already is one."""
+        return code
+
+    def prerender(self, code: str) -> bool:
+        """Build the HTML document."""
+        WARM_CACHE.put(self.cache_key(code), self.render_html(code))
+        return True
+
+    def export_output(self, code: str, max_bytes: int | None = None) -> bytes | None:
+        """Return the HTML document."""
+        data = self.render_html(code).encode()
+        return data if max_bytes is None or len(data) <= max_bytes else None
+
+    def run_headless(
+        self, code: str, console: ConsoleLog | None = None
+    ) -> HeadlessResult:
+        """Return the HTML document."""
+        return HeadlessResult(html=self.render_html(code))
+
+    def run(
+        self,
+        code: str,
+        container: DeltaGenerator,
+        options: RunOptions | None = None,
+    ) -> None:
         """
         Renders the provided HTML/CSS/JavaScript code inside the given container.
 
         Args:
             code (str): The HTML/CSS/JavaScript code to render.
             container (DeltaGenerator): The Streamlit container to render output in.
+            options (RunOptions | None): Per-run flags; only `output` is used.
 
         Returns:
             None
         """
+        options = options or RunOptions()
         with container:
             try:
-                components.html(code, height=640, scrolling=True)
+                html = WARM_CACHE.get(self.cache_key(code))
+                if options.output is not None:
+                    html = options.output.decode()
+                elif html is None:
+                    html = self.render_html(code)
+                show_html(html, height=640)
             except Exception as e:
                 st.error(f"Error rendering HTML/CSS/JavaScript: {e}")
                 st.exception(e)
@@ -0,0 +1,93 @@
+import contextlib
+import resource
+import sys
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+from loguru import logger
+
+# ru_maxrss is reported in KiB on Linux but in bytes on macOS.
+_RSS_UNIT = 1024 if sys.platform == "darwin" else 1
+
+_current: ContextVar["RunMetrics | None"] = ContextVar("run_metrics", default=None)
+
+
+@dataclass(slots=True)
+class RunMetrics:
+    """Resources used by a single engine.run call."""
+
+    engine: str
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0  # CPU time of the calling thread only
+    peak_rss_delta_kib: int = 0  # growth of the process' peak RSS
+    stdout_bytes: int = 0
+    exception: str | None = None
+    payload_bytes: int | None = None  # HTML (or its preview URL) sent to the browser
+    queue_wait_ms: float = 0.0  # time waiting for a run slot, included in wall_ms
+
+    def summary(self) -> str:
+        """Returns a compact, human-readable status line."""
+        parts = [f"{self.wall_ms:,.1f} ms wall"]
+        if self.queue_wait_ms >= 1:
+            parts.append(f"{self.queue_wait_ms:,.1f} ms queued")
+        parts += [
+            f"{self.cpu_ms:,.1f} ms CPU",
+            f"+{self.peak_rss_delta_kib:,} KiB peak RSS",
+            f"{_format_bytes(self.stdout_bytes)} stdout",
+        ]
+        if self.payload_bytes is not None:
+            parts.append(f"{_format_bytes(self.payload_bytes)} HTML")
+        if self.exception:
+            parts.append(self.exception)
+        return " · ".join(parts)
+
+
+def _format_bytes(size: int) -> str:
+    return f"{size / 1024:,.1f} KiB" if size >= 1024 else f"{size} B"
+
+
+def _peak_rss_kib() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // _RSS_UNIT
+
+
+def record(**fields) -> None:
+    """
+    Adds engine-reported fields (e.g. stdout_bytes) to the run being tracked
+    in the current context. Does nothing outside track_run().
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        for name, value in fields.items():
+            setattr(metrics, name, value)
+
+
+@contextlib.contextmanager
+def track_run(engine: str) -> Iterator[RunMetrics]:
+    """
+    Measures the engine.run call made inside the block and logs the result
+    as a structured loguru record.
+
+    Args:
+        engine (str): Name of the engine being run.
+
+    Yields:
+        RunMetrics: Completed once the block exits.
+    """
+    metrics = RunMetrics(engine=str(engine))
+    token = _current.set(metrics)
+    rss_before = _peak_rss_kib()
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    try:
+        yield metrics
+    except Exception as e:
+        metrics.exception = type(e).__name__
+        raise
+    finally:
+        metrics.wall_ms = (time.perf_counter() - wall_start) * 1e3
+        metrics.cpu_ms = (time.thread_time() - cpu_start) * 1e3
+        metrics.peak_rss_delta_kib = _peak_rss_kib() - rss_before
+        _current.reset(token)
+        logger.bind(**asdict(metrics)).info("engine.run: {}", metrics.summary())
@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit.components.v1 as components
+from loguru import logger
+
+from settings import settings
+
+from .cache import LRUCache
+from .metrics import record
+
+PREVIEW_CACHE_SIZE = 256
+PREVIEW_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_PATH = re.compile(r"^/p/([0-9a-f]{64})\.html$")
+
+
+@dataclass(frozen=True, slots=True)
+class _Preview:
+    body: bytes
+    gzipped: bytes
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    server: "PreviewServer"
+
+    def do_GET(self) -> None:
+        match = _PATH.match(self.path.split("?", 1)[0])
+        preview = match and self.server.previews.get(match.group(1))
+        if not preview:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        etag = f'"{match.group(1)}"'  # strong: the digest is of the exact body
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        body = preview.gzipped if use_gzip else preview.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_cache_headers(self, etag: str) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("Preview server: {}", format % args)
+
+
+class PreviewServer(ThreadingHTTPServer):
+    """
+    Serves rendered HTML previews from content-addressed URLs.
+
+    A preview's URL is derived from the SHA-256 of its HTML, so unchanged code
+    maps to the same URL: Streamlit keeps the existing iframe (and whatever is
+    running in it) and the browser can answer repeat loads from its cache.
+    Bodies are stored gzip-compressed alongside the original in a bounded LRU.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str, port: int, public_url: str | None = None):
+        super().__init__((host, port), _PreviewHandler)
+        self.previews: LRUCache[str, _Preview] = LRUCache(
+            maxsize=PREVIEW_CACHE_SIZE,
+            max_weight=PREVIEW_CACHE_MAX_BYTES,
+            weigher=lambda p: len(p.body) + len(p.gzipped),
+        )
+        default_url = f"http://{host}:{self.server_address[1]}"
+        self.public_url = (public_url or default_url).rstrip("/")
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="preview-server", daemon=True
+        )
+        self._thread.start()
+
+    def publish(self, html: str) -> str:
+        """
+        Stores an HTML document and returns the URL it is served from.
+
+        Args:
+            html (str): The complete document.
+
+        Returns:
+            str: The document's content-addressed URL.
+        """
+        body = html.encode()
+        digest = hashlib.sha256(body).hexdigest()
+        self.previews.get_or_set(
+            digest, lambda: _Preview(body=body, gzipped=gzip.compress(body, mtime=0))
+        )
+        return f"{self.public_url}/p/{digest}.html"
+
+
+_preview_server: PreviewServer | None = None
+_preview_server_failed = False
+_preview_server_lock = threading.Lock()
+
+
+def get_preview_server() -> PreviewServer | None:
+    """
+    Returns the process-wide preview server, starting it on first use.
+
+    Returns:
+        PreviewServer | None: The server, or None if `APP_PREVIEW_SERVER` is
+            off or it couldn't be started.
+    """
+    global _preview_server, _preview_server_failed
+    if not settings.preview_server:
+        return None
+    with _preview_server_lock:
+        if _preview_server is None and not _preview_server_failed:
+            try:
+                _preview_server = PreviewServer(
+                    settings.host, settings.preview_port, settings.preview_url
+                )
+            except OSError as e:
+                logger.warning("Preview server unavailable, inlining HTML: {}", e)
+                _preview_server_failed = True
+                return None
+            logger.info("Serving previews at {}", _preview_server.public_url)
+        return _preview_server
+
+
+def show_html(html: str, height: int) -> None:
+    """
+    Embeds an HTML document in the current container, by URL if the preview
+    server is enabled and inline through components.html otherwise.
+
+    Args:
+        html (str): The complete document.
+        height (int): Height of the iframe in pixels.
+    """
+    server = get_preview_server()
+    if server is None:
+        record(payload_bytes=len(html.encode()))
+        components.html(html, height=height, scrolling=True)
+    else:
+        url = server.publish(html)
+        record(payload_bytes=len(url))
+        components.iframe(url, height=height, scrolling=True)
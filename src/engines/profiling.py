@@ -0,0 +1,107 @@
+import contextlib
+import cProfile
+import marshal
+import pstats
+import threading
+import tracemalloc
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+LOCK_POLL_INTERVAL = 0.1  # seconds; lets a cancelled run stop waiting
+
+# Held for the duration of a profiled run; see profile_run().
+_profile_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class ProfileReport:
+    """Results of a profiled run, filled in when profiling stops."""
+
+    functions: list[dict] = field(default_factory=list)
+    allocations: list[dict] | None = None
+    pstats_data: bytes = b""
+
+
+@contextlib.contextmanager
+def profile_run(trace_memory: bool = False) -> Iterator[ProfileReport]:
+    """
+    Profiles the code executed inside the block with cProfile and, optionally,
+    tracemalloc.
+
+    Profiled runs are serialized across sessions: tracemalloc is process-wide,
+    so one run stopping it would break another's snapshot, and from Python
+    3.12 only one cProfile profiler can be active per process. cProfile
+    only observes the calling thread, but allocations made by other
+    sessions during the run are included in the report.
+
+    Args:
+        trace_memory (bool): Also record the top allocation sites.
+
+    Yields:
+        ProfileReport: Populated once the block exits.
+    """
+    # Polled rather than blocking, so that an asynchronous cancellation
+    # reaches a run waiting for its turn.
+    while not _profile_lock.acquire(timeout=LOCK_POLL_INTERVAL):
+        pass
+    try:
+        report = ProfileReport()
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot() if trace_memory else None
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            if trace_memory:
+                report.allocations = _top_allocations(snapshot_before)
+            if started_tracing:
+                tracemalloc.stop()
+
+            stats = pstats.Stats(profiler)
+            report.functions = _top_functions(stats)
+            report.pstats_data = marshal.dumps(stats.stats)  # same format as dump_stats
+    finally:
+        _profile_lock.release()
+
+
+def _top_functions(stats: pstats.Stats) -> list[dict]:
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": name,
+                "location": f"{filename}:{line}",
+                "calls": ncalls,
+                "total time (s)": round(tottime, 6),
+                "cumulative time (s)": round(cumtime, 6),
+                "per call (ms)": round(cumtime / ncalls * 1e3, 4) if ncalls else 0.0,
+            }
+        )
+    rows.sort(key=lambda row: row["cumulative time (s)"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def _top_allocations(before: tracemalloc.Snapshot) -> list[dict]:
+    ignored = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ]
+    after = tracemalloc.take_snapshot().filter_traces(ignored)
+    diffs = after.compare_to(before.filter_traces(ignored), "lineno")
+    return [
+        {
+            "location": f"{d.traceback[0].filename}:{d.traceback[0].lineno}",
+            "size (KiB)": round(d.size_diff / 1024, 1),
+            "blocks": d.count_diff,
+        }
+        for d in diffs[:TOP_ALLOCATIONS]
+        if d.size_diff > 0
+    ]
@@ -7,21 +7,16 @@ data = {
 }
 
 df = pd.DataFrame(data)
-print("Initial DataFrame:")
-print(df, "\n")
+# display() and a trailing expression render sortable, paginated tables.
+display(df)  # noqa: F821
 
 summary = df.groupby("Region")["Sales"].agg(["sum", "mean"]).reset_index()
 summary.rename(columns={"sum": "Total Sales", "mean": "Average Sales"}, inplace=True)
-print("Sales Summary by Region:")
-print(summary, "\n")
+display(summary)  # noqa: F821
 
 top_region = summary.loc[summary["Total Sales"].idxmax(), "Region"]
 print(f"🏆 Top Region: {top_region}\n")
 
 pivot = df.pivot_table(values="Sales", index="Region", columns="Month", aggfunc="sum")
-print("Pivot Table (Sales by Region and Month):")
-print(pivot, "\n")
-
 pivot["Growth %"] = ((pivot["Feb"] - pivot["Jan"]) / pivot["Jan"] * 100).round(2)
-print("With Growth Percentage:")
-print(pivot)
+pivot
@@ -0,0 +1,15 @@
+# ruff: noqa: F704, PLE1142 (top-level await is allowed in snippets)
+import asyncio
+
+# Top-level `await` runs on this session's event loop, and the injected
+# `async_http_client` keeps its connections open between runs.
+client = async_http_client  # noqa: F821
+HN_API = "https://hacker-news.firebaseio.com/v0"
+
+top = await client.get(f"{HN_API}/topstories.json")
+responses = await asyncio.gather(
+    *(client.get(f"{HN_API}/item/{id}.json") for id in top.json()[:30])
+)
+
+for item in (response.json() for response in responses):
+    print(f"{item.get('score', 0):>5}  {item.get('title')}")
@@ -0,0 +1,6 @@
+# `http_client` is a shared httpx.Client: connections stay open between runs
+# and responses are cached on disk for as long as their headers allow.
+url = "https://api-open.data.gov.sg/v2/real-time/api/two-hr-forecast"
+response = http_client.get(url)  # noqa: F821
+
+print(response.json())
@@ -1,11 +1,70 @@
 from pathlib import Path
 
-from ..python_base_engine import PythonBaseEngine
+import streamlit as st
+
+from settings import settings
+
+from ..backends import ExecutionBackend, get_backend
+from ..display import DISPLAY_HOOK, display, display_result
+from ..python_base_engine import LAST_RUN_KEY, PythonBaseEngine
+from ..warm_cache import WARM_CACHE
 
 
 class PythonEngine(PythonBaseEngine):
     """Engine for executing Python code snippets."""
 
+    def get_execution_globals(self) -> dict:
+        """Inject display() and the hook that shows the last expression."""
+        return {
+            **super().get_execution_globals(),
+            "display": display,
+            DISPLAY_HOOK: display_result,
+        }
+
+    @property
+    def backend(self) -> ExecutionBackend:
+        """Use the backend selected by the `APP_PYTHON_BACKEND` setting."""
+        return get_backend(settings.python_backend)
+
+    @property
+    def memoize_results(self) -> bool:
+        """Replay unchanged snippets if `APP_RESULT_CACHE` is enabled."""
+        return settings.result_cache
+
+    @property
+    def display_results(self) -> bool:
+        """Show the last expression like a notebook cell would."""
+        return True
+
+    @property
+    def supports_cells(self) -> bool:
+        """Cells only print, so unchanged cells can be replayed from the session."""
+        return True
+
+    def prerender(self, code: str) -> bool:
+        """Execute the snippet and keep its output if it ran without errors."""
+        snippet = self.compile(code)
+        if not snippet.ok:
+            return False
+        result = self._capture(snippet)
+        if result.error is not None:
+            return False
+        WARM_CACHE.put(self.cache_key(code), result)
+        return True
+
+    def export_output(self, code: str, max_bytes: int | None = None) -> bytes | None:
+        """Serialize the console output and tables of the latest or warm run."""
+        key = self.cache_key(code)
+        last = st.session_state.get(LAST_RUN_KEY)
+        result = last[1] if last is not None and last[0] == key else WARM_CACHE.get(key)
+        if result is None or result.error is not None:
+            return None
+        # Checked first, so that a huge spilled console isn't read back.
+        if max_bytes is not None and result.console.size > max_bytes:
+            return None
+        data = result.to_bytes()
+        return data if max_bytes is None or len(data) <= max_bytes else None
+
     def list_examples(self) -> list[Path]:
         """Lists available example files for this engine."""
         examples_dir = Path(__file__).parent / "examples"
@@ -1,16 +1,121 @@
 import ast
 import contextlib
-import io
+import json
+import traceback
+from dataclasses import dataclass, replace
 from pathlib import Path
+from types import CodeType
 
 import streamlit as st
+from loguru import logger
 from streamlit.delta_generator import DeltaGenerator
 
-from .base_engine import BaseEngine
+from settings import settings
+
+from .backends import IN_PROCESS_BACKEND, ExecutionBackend, RemoteTraceback
+from .base_engine import BaseEngine, HeadlessResult, RunOptions
+from .budgets import Budget, BudgetExceeded, enforce_budget, limit_output
+from .cache import LRUCache
+from .cancellation import RunInterrupted
+from .cells import (
+    CELL_STATE_KEY,
+    CellNames,
+    CellState,
+    cell_names,
+    cells_to_run,
+    split_cells,
+)
+from .console import ConsoleLog, StreamingConsole
+from .console_viewer import show_console_log
+from .display import (
+    DisplayCapture,
+    TableOutput,
+    capture_display,
+    display_last_expression,
+    table_from_ipc,
+    table_to_csv,
+    table_to_ipc,
+)
+from .metrics import record
+from .profiling import ProfileReport, profile_run
+from .table_viewer import show_table
+from .warm_cache import WARM_CACHE
 
 DISALLOWED_PYTHON_PACKAGES = frozenset(
     {"os", "sys", "subprocess", "shutil", "pathlib", "socket"}
 )
+COMPILE_CACHE_SIZE = 256
+RESULT_CACHE_SIZE = 512
+LAST_RUN_KEY = "last_run"  # st.session_state key holding (cache key, CapturedRun)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledSnippet:
+    """Safety verdict and, if safe, the compiled code object for a snippet."""
+
+    ok: bool
+    message: str
+    code: CodeType | None = None
+    names: CellNames = CellNames()  # global names read and written
+
+
+@dataclass(frozen=True, slots=True)
+class CapturedRun:
+    """Console output, displayed tables and exception captured from a snippet."""
+
+    console: ConsoleLog
+    error: BaseException | None = None
+    tables: tuple[TableOutput, ...] = ()
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the console output and tables of a run that didn't fail:
+        a JSON header line, then each table in the Arrow IPC format.
+        """
+        blobs = [table_to_ipc(output.table) for output in self.tables]
+        header = {"stdout": self.console.getvalue(), "tables": list(map(len, blobs))}
+        return b"\n".join([json.dumps(header).encode(), *blobs])
+
+    def without_frames(self) -> "CapturedRun":
+        """
+        Returns the run with its exception's traceback kept as text only, so
+        that a cached run doesn't pin the snippet's frames and, through them,
+        every object in its namespace.
+        """
+        if self.error is None:
+            return self
+        tb = "".join(traceback.format_exception(self.error))
+        error = self.error.with_traceback(None)
+        error.__context__ = None
+        error.__cause__ = RemoteTraceback(tb)
+        return replace(self, error=error)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CapturedRun":
+        """Reads a run serialized by to_bytes()."""
+        line, _, rest = data.partition(b"\n")
+        header = json.loads(line)
+        console = ConsoleLog(memory_limit=settings.console_memory_bytes)
+        console.write(header["stdout"])
+        tables, offset = [], 0
+        for size in header["tables"]:
+            tables.append(TableOutput(table_from_ipc(rest[offset : offset + size])))
+            offset += size + 1
+        return cls(console=console, tables=tuple(tables))
+
+
+# Shared by every session in the process, keyed by (engine type, source hash).
+COMPILE_CACHE: LRUCache[tuple[str, str], CompiledSnippet] = LRUCache(
+    maxsize=COMPILE_CACHE_SIZE
+)
+RESULT_CACHE: LRUCache[tuple[str, str], CapturedRun] = LRUCache(
+    maxsize=RESULT_CACHE_SIZE,
+    ttl=settings.result_cache_ttl,
+    max_weight=settings.result_cache_max_bytes,
+    weigher=lambda result: (  # spilled console bytes count too
+        result.console.size + sum(t.table.nbytes for t in result.tables)
+    ),
+)
 
 
 class PythonBaseEngine(BaseEngine):
@@ -28,16 +133,113 @@ class PythonBaseEngine(BaseEngine):
         Returns the global variables to inject into exec().
         Override this method to customize the execution environment.
         """
-        return {"__name__": "__main__"}
+        # Imported here so that engines don't load httpx until a snippet runs.
+        from .http_client import get_async_http_client, get_http_client
 
-    def show_console_output(self, console: str) -> None:
+        return {
+            "__name__": "__main__",
+            "http_client": get_http_client(),
+            "async_http_client": get_async_http_client(),
+        }
+
+    @property
+    def backend(self) -> ExecutionBackend:
+        """
+        Returns the backend that executes compiled snippets.
+        Override this property to run code outside the Streamlit process.
+        """
+        return IN_PROCESS_BACKEND
+
+    def show_console_output(self, console: ConsoleLog, live: bool = False) -> None:
         """
         Displays console output.
         Override this method to customize how console output is shown.
+
+        Args:
+            console (ConsoleLog): The captured output.
+            live (bool): True while the snippet is still running, in which
+                case this is called repeatedly and must not create widgets.
+        """
+        show_console_log(console, live=live)
+
+    def show_error(self, error: BaseException) -> None:
+        """
+        Displays the exception a run ended with.
+        Override this method to customize how errors are shown.
+        """
+        if isinstance(error, BudgetExceeded):
+            st.error(f"Budget exceeded: {error}", icon="⏱️")
+        elif error.__traceback__ is None and isinstance(
+            error.__cause__, RemoteTraceback
+        ):
+            # Raised in a worker or replayed from the cache: only text is left.
+            st.error(f"{type(error).__name__}: {error}")
+            st.code(error.__cause__.tb, language="text")
+        else:
+            st.exception(error)
+
+    def show_table(self, output: TableOutput) -> None:
+        """
+        Displays a table passed to display() or left as the last expression.
+        Override this method to customize how tables are shown.
+        """
+        show_table(output)
+
+    def show_profile(self, report: ProfileReport) -> None:
+        """
+        Displays the profile of a run.
+        Override this method to customize how profiles are shown.
+        """
+        with st.expander("Profile", expanded=True):
+            st.caption("Top functions by cumulative time")
+            st.dataframe(report.functions, hide_index=True)
+            if report.allocations is not None:
+                st.caption("Top allocation sites")
+                st.dataframe(report.allocations, hide_index=True)
+            st.download_button(
+                "Download .pstats",
+                report.pstats_data,
+                file_name="snippet.pstats",
+                mime="application/octet-stream",
+                on_click="ignore",
+            )
+
+    @property
+    def memoize_results(self) -> bool:
+        """
+        Whether results may be replayed from the result cache instead of
+        re-executing unchanged code. Only enable this for engines whose
+        snippets render nothing but console output, tables and exceptions.
+        """
+        return False
+
+    @property
+    def budget(self) -> Budget:
+        """
+        Returns the limits each run of this engine executes under.
+        Override this property to give an engine its own budget.
+        """
+        return Budget(
+            wall_time=settings.budget_wall_time,
+            line_events=settings.budget_line_events,
+            output_chars=settings.budget_output_chars,
+        )
+
+    @property
+    def display_results(self) -> bool:
+        """
+        Whether the value of a snippet's last expression is displayed, as in a
+        notebook. Engines enabling this must provide the DISPLAY_HOOK global
+        (and usually `display`) from get_execution_globals().
         """
-        st.code(console, language="text", wrap_lines=True)
+        return False
 
-    def run(self, code: str, container: DeltaGenerator) -> None:
+    def run(
+        self,
+        code: str,
+        container: DeltaGenerator,
+        options: RunOptions | None = None,
+    ) -> None:
         """
         Executes the provided Python code inside the given container,
         after performing basic safety checks.
@@ -45,43 +247,267 @@ class PythonBaseEngine(BaseEngine):
         Args:
             code (str): The Python code to execute.
             container (DeltaGenerator): The Streamlit container to render output in.
+            options (RunOptions | None): Per-run flags; `force` bypasses the
+                result cache, `profile` runs the code under the profiler and
+                `cells` re-runs only the cells that changed.
 
         Returns:
             None
         """
-        ok, msg = self._basic_safety_check(code)
+        options = options or RunOptions()
+        if options.cells and self.supports_cells and not options.profile:
+            self._run_cells(code, container)
+            return
 
-        if not ok:
-            st.error(msg)
+        snippet = self.compile(code)
+
+        if not snippet.ok:
+            st.error(snippet.message)
         else:
             with container:
-                output_buffer = io.StringIO()
-                with contextlib.redirect_stdout(output_buffer):
-                    try:
-                        glb = self.get_execution_globals()
-                        exec(code, glb, None)
-                    except Exception as e:
-                        st.exception(e)
-                    finally:
-                        console = output_buffer.getvalue()
-                        if console:
-                            self.show_console_output(console)
-
-    def _basic_safety_check(self, src: str) -> tuple[bool, str]:
-        """
-        Checks the provided Python source code for forbidden imports.
+                key = self.cache_key(code)
+                result = None
+                if options.output is not None:
+                    result = self._import_output(options.output)
+                if result is None and not (options.force or options.profile):
+                    result = WARM_CACHE.get(key)
+                    if result is None and self.memoize_results:
+                        result = RESULT_CACHE.get(key)
+
+                if result is not None:
+                    record(
+                        stdout_bytes=result.console.size,
+                        exception=type(result.error).__name__ if result.error else None,
+                    )
+                    self._replay(result)
+                else:
+                    result = self._execute(snippet, container, profile=options.profile)
+                    # Later reruns show this run, not the pre-rendered output.
+                    WARM_CACHE.pop(key)
+                    if self.memoize_results and not isinstance(
+                        result.error, RunInterrupted
+                    ):
+                        RESULT_CACHE.put(key, result.without_frames())
+
+                # Kept for export_output(), e.g. when the snippet is shared.
+                if result.error is None:
+                    st.session_state[LAST_RUN_KEY] = (key, result)
+                else:
+                    st.session_state.pop(LAST_RUN_KEY, None)
+
+    def _import_output(self, data: bytes) -> "CapturedRun | None":
+        try:
+            return CapturedRun.from_bytes(data)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Could not read a stored output, running instead: {}", e)
+            return None
+
+    def _run_cells(self, code: str, container: DeltaGenerator) -> None:
+        """
+        Runs code as `# %%` cells in a namespace kept in the session, executing
+        only the cells that changed and the cells that read what they write.
+        Output of the other cells is replayed from their last run.
+        """
+        sources = split_cells(code)
+        snippets = [self.compile(source) for source in sources]
+        rejected = next((snippet for snippet in snippets if not snippet.ok), None)
+        if rejected is not None:
+            st.error(rejected.message)
+            return
+
+        states = st.session_state.setdefault(CELL_STATE_KEY, {})
+        state = states.setdefault(type(self).__qualname__, CellState())
+        if not state.namespace:
+            state.namespace.update(self.get_execution_globals())
+
+        digests = [self.cache_key(source)[1] for source in sources]
+        to_run = cells_to_run(digests, [s.names for s in snippets], state.digests)
+        previous = state.results
+        state.digests = [""] * len(sources)
+        state.results = [None] * len(sources)
+
+        stdout_bytes = 0
+        error = None
+        with container:
+            for i, snippet in enumerate(snippets):
+                cell_container = st.container()
+                if i not in to_run:
+                    cell_container.caption(f"Cell {i + 1} · unchanged")
+                    with cell_container:
+                        self._replay(previous[i])
+                    state.digests[i], state.results[i] = digests[i], previous[i]
+                elif error is not None:
+                    cell_container.caption(f"Cell {i + 1} · skipped")
+                else:
+                    cell_container.caption(f"Cell {i + 1}")
+                    with cell_container:
+                        result = self._execute(
+                            snippet, cell_container, namespace=state.namespace
+                        )
+                    stdout_bytes += result.console.size
+                    error = result.error
+                    state.results[i] = result
+                    if error is None:
+                        state.digests[i] = digests[i]
+
+        record(
+            stdout_bytes=stdout_bytes,
+            exception=type(error).__name__ if error is not None else None,
+        )
+
+    def _replay(self, result: CapturedRun) -> None:
+        """Renders a previously captured run without executing anything."""
+        if result.error is not None:
+            self.show_error(result.error)
+        if result.console.size:
+            self.show_console_output(result.console)
+        for table in result.tables:
+            self.show_table(table)
+
+    def _execute(
+        self,
+        snippet: CompiledSnippet,
+        container: DeltaGenerator,
+        profile: bool = False,
+        namespace: dict | None = None,
+    ) -> CapturedRun:
+        """
+        Runs a compiled snippet through the backend, rendering its output.
+        Profiled runs, and cells running in a session namespace, always execute
+        in-process.
+        """
+        placeholder = None
+
+        console = ConsoleLog(memory_limit=settings.console_memory_bytes)
+
+        def render_console(live: bool = False) -> None:
+            nonlocal placeholder
+            if placeholder is None:
+                placeholder = container.empty()
+            with placeholder.container():
+                self.show_console_output(console, live=live)
+
+        if settings.console_streaming:
+            output_buffer = StreamingConsole(
+                lambda: render_console(live=True),
+                console,
+                flush_interval=settings.console_flush_interval,
+                flush_bytes=settings.console_flush_bytes,
+            )
+            # Stops live renders before the final one below.
+            streaming = contextlib.closing(output_buffer)
+        else:
+            output_buffer = console
+            streaming = contextlib.nullcontext()
+
+        if profile:
+            backend = IN_PROCESS_BACKEND
+            profiler = profile_run(trace_memory=settings.profile_memory)
+        else:
+            backend = self.backend
+            profiler = contextlib.nullcontext()
+
+        displayed = DisplayCapture()
+        with (
+            profiler as report,
+            capture_display(displayed),
+            enforce_budget(self.budget),
+            streaming,
+        ):
+            limit_output(console)
+            if namespace is None:
+                error = backend.execute(self, snippet.code, output_buffer)
+            else:
+                error = IN_PROCESS_BACKEND.execute_in(
+                    namespace, snippet.code, output_buffer
+                )
+        if error is not None:
+            self.show_error(error)
+
+        record(
+            stdout_bytes=console.size,
+            exception=type(error).__name__ if error is not None else None,
+        )
+        if console.size:
+            render_console()
+        for table in displayed.tables:
+            self.show_table(table)
+        if report is not None:
+            self.show_profile(report)
+        return CapturedRun(console=console, error=error, tables=tuple(displayed.tables))
+
+    def _capture(
+        self, snippet: CompiledSnippet, console: ConsoleLog | None = None
+    ) -> CapturedRun:
+        """Runs a compiled snippet without rendering anything, e.g. outside a session."""
+        if console is None:
+            console = ConsoleLog(memory_limit=settings.console_memory_bytes)
+        displayed = DisplayCapture()
+        with capture_display(displayed), enforce_budget(self.budget):
+            limit_output(console)
+            error = self.backend.execute(self, snippet.code, console)
+        return CapturedRun(console=console, error=error, tables=tuple(displayed.tables))
+
+    def run_headless(
+        self, code: str, console: ConsoleLog | None = None
+    ) -> HeadlessResult:
+        """
+        Executes the snippet and returns its console output, displayed tables
+        (as CSV) and exception.
+        """
+        snippet = self.compile(code)
+        if not snippet.ok:
+            return HeadlessResult(error=snippet.message)
+        result = self._capture(snippet, console)
+        error = None
+        if result.error is not None:
+            error = "".join(traceback.format_exception(result.error)).rstrip()
+        return HeadlessResult(
+            stdout=result.console.getvalue(),
+            error=error,
+            tables=tuple(table_to_csv(t.table) for t in result.tables) or None,
+        )
+
+    def compile(self, code: str) -> CompiledSnippet:
+        """
+        Safety-checks and compiles the provided Python code, reusing the
+        process-wide cache so unchanged code is never parsed twice.
 
         Args:
-            src (str): The source code to check.
+            code (str): The Python code to compile.
 
         Returns:
-            tuple[bool, str]: (True, "") if safe, (False, reason) if unsafe.
+            CompiledSnippet: The safety verdict and compiled code object.
+        """
+        return COMPILE_CACHE.get_or_set(
+            self.cache_key(code), lambda: self._compile_source(code)
+        )
+
+    def _compile_source(self, src: str) -> CompiledSnippet:
+        """
+        Parses src once, then safety-checks, analyses and compiles the tree
+        without consulting the cache.
         """
         try:
             tree = ast.parse(src)
         except SyntaxError as e:
-            return False, f"Syntax error: {e}"
+            return CompiledSnippet(ok=False, message=f"Syntax error: {e}")
+        ok, msg = self._check_tree(tree)
+        if not ok:
+            return CompiledSnippet(ok=False, message=msg)
+        names = cell_names(tree)
+        if self.display_results:
+            tree = display_last_expression(tree)
+        try:
+            code = compile(
+                tree, "<string>", "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT
+            )
+        except SyntaxError as e:
+            return CompiledSnippet(ok=False, message=f"Syntax error: {e}")
+        return CompiledSnippet(ok=True, message="", code=code, names=names)
 
+    def _check_tree(self, tree: ast.Module) -> tuple[bool, str]:
+        """Checks an already parsed module for forbidden imports."""
         for node in ast.walk(tree):
             if isinstance(node, ast.Import):
                 if any(
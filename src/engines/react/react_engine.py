@@ -1,10 +1,13 @@
 from pathlib import Path
 
 import streamlit as st
-import streamlit.components.v1 as components
 from streamlit.delta_generator import DeltaGenerator
 
-from ..base_engine import BaseEngine
+from ..base_engine import BaseEngine, HeadlessResult, RunOptions
+from ..console import ConsoleLog
+from ..preview_server import show_html
+from ..warm_cache import WARM_CACHE
+from .transpiler import TranspileError, transpile_tsx
 
 
 class ReactEngine(BaseEngine):
@@ -14,21 +17,35 @@ class ReactEngine(BaseEngine):
     def language(self) -> str:
         return "typescript"
 
-    def run(self, code: str, container: DeltaGenerator) -> None:
+    def render_html(self, code: str) -> str:
         """
-        Renders the provided React TypeScript code inside the given container.
+        Builds the HTML document that renders the provided React TypeScript code.
 
-        The code is wrapped in a complete HTML document with React, ReactDOM, and Babel
-        loaded from CDN. The TypeScript code is transpiled to JavaScript in the browser.
+        If esbuild is available the code is transpiled on the server (with the
+        result cached by source hash) and embedded as plain JavaScript.
+        Otherwise the page loads Babel from CDN and transpiles it in the browser.
 
         Args:
             code (str): The React TypeScript code to render.
-            container (DeltaGenerator): The Streamlit container to render output in.
 
         Returns:
-            None
+            str: A complete HTML document.
+
+        Raises:
+            TranspileError: If server-side transpilation fails.
         """
-        html_template = f"""
+        js = transpile_tsx(code)
+        if js is None:
+            babel = (
+                '<script src="https://unpkg.com/@babel/standalone/babel.min.js">'
+                "</script>"
+            )
+            script = f'<script type="text/babel" data-type="module">\n{code}\n</script>'
+        else:
+            babel = ""
+            script = f'<script type="module">\n{js}\n</script>'
+
+        return f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -37,7 +54,7 @@ class ReactEngine(BaseEngine):
     <title>React TypeScript App</title>
     <script crossorigin src="https://unpkg.com/react@18/umd/react.production.min.js"></script>
     <script crossorigin src="https://unpkg.com/react-dom@18/umd/react-dom.production.min.js"></script>
-    <script src="https://unpkg.com/@babel/standalone/babel.min.js"></script>
+    {babel}
     <style>
         body {{
             margin: 0;
@@ -55,15 +72,69 @@ class ReactEngine(BaseEngine):
 </head>
 <body>
     <div id="root"></div>
-    <script type="text/babel" data-type="module">
-{code}
-    </script>
+    {script}
 </body>
 </html>
 """
+
+    def prerender(self, code: str) -> bool:
+        """Transpile the code and build its HTML document."""
+        try:
+            html = self.render_html(code)
+        except TranspileError:
+            return False
+        WARM_CACHE.put(self.cache_key(code), html)
+        return True
+
+    def export_output(self, code: str, max_bytes: int | None = None) -> bytes | None:
+        """Return the warm HTML document, or build it."""
+        try:
+            html = WARM_CACHE.get(self.cache_key(code)) or self.render_html(code)
+        except TranspileError:
+            return None
+        data = html.encode()
+        return data if max_bytes is None or len(data) <= max_bytes else None
+
+    def run_headless(
+        self, code: str, console: ConsoleLog | None = None
+    ) -> HeadlessResult:
+        """Transpile the code and return its HTML document."""
+        try:
+            return HeadlessResult(html=self.render_html(code))
+        except TranspileError as e:
+            return HeadlessResult(error=f"Error transpiling React TypeScript:\n{e}")
+
+    def run(
+        self,
+        code: str,
+        container: DeltaGenerator,
+        options: RunOptions | None = None,
+    ) -> None:
+        """
+        Renders the provided React TypeScript code inside the given container.
+
+        Args:
+            code (str): The React TypeScript code to render.
+            container (DeltaGenerator): The Streamlit container to render output in.
+            options (RunOptions | None): Per-run flags; only `output` is used.
+
+        Returns:
+            None
+        """
+        options = options or RunOptions()
         with container:
             try:
-                components.html(html_template, height=800, scrolling=True)
+                html = WARM_CACHE.get(self.cache_key(code))
+                if options.output is not None:
+                    html = options.output.decode()
+                elif html is None:
+                    html = self.render_html(code)
+            except TranspileError as e:
+                st.error(f"Error transpiling React TypeScript:\n\n```\n{e}\n```")
+                return
+
+            try:
+                show_html(html, height=800)
             except Exception as e:
                 st.error(f"Error rendering React TypeScript: {e}")
                 st.exception(e)
@@ -0,0 +1,82 @@
+import hashlib
+import shutil
+import subprocess
+from dataclasses import dataclass
+
+from settings import settings
+
+from ..cache import LRUCache
+
+TRANSPILE_CACHE_SIZE = 128
+TRANSPILE_TIMEOUT = 10  # seconds
+
+
+class TranspileError(Exception):
+    """Raised when TSX source fails to transpile, e.g. because of a syntax error."""
+
+
+@dataclass(frozen=True, slots=True)
+class _Transpiled:
+    js: str
+    error: str = ""
+
+
+# Keyed by source hash; failures are cached too so a broken snippet isn't
+# re-transpiled on every rerun.
+TRANSPILE_CACHE: LRUCache[str, _Transpiled] = LRUCache(maxsize=TRANSPILE_CACHE_SIZE)
+
+
+def find_esbuild() -> str | None:
+    """Returns the esbuild executable to use, or None if it isn't available."""
+    if settings.esbuild_path:
+        return settings.esbuild_path
+    return shutil.which("esbuild")
+
+
+def transpile_tsx(code: str) -> str | None:
+    """
+    Transpiles TSX to plain JavaScript on the server with esbuild.
+
+    Args:
+        code (str): The React TypeScript source.
+
+    Returns:
+        str | None: The transpiled JavaScript, or None if esbuild isn't
+            installed and the browser has to transpile the code instead.
+
+    Raises:
+        TranspileError: If esbuild rejects the source.
+    """
+    esbuild = find_esbuild()
+    if esbuild is None:
+        return None
+
+    digest = hashlib.sha256(code.encode()).hexdigest()
+    result = TRANSPILE_CACHE.get_or_set(digest, lambda: _run_esbuild(esbuild, code))
+    if result.error:
+        raise TranspileError(result.error)
+    return result.js
+
+
+def _run_esbuild(esbuild: str, code: str) -> _Transpiled:
+    try:
+        proc = subprocess.run(
+            [
+                esbuild,
+                "--loader=tsx",
+                "--jsx=transform",
+                "--target=es2020",
+                "--sourcefile=App.tsx",
+                "--log-level=error",
+                "--color=false",
+            ],
+            input=code,
+            capture_output=True,
+            text=True,
+            timeout=TRANSPILE_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise TranspileError(f"Could not run esbuild: {e}") from e
+    if proc.returncode != 0:
+        return _Transpiled(js="", error=proc.stderr.strip() or "Transpilation failed.")
+    return _Transpiled(js=proc.stdout)
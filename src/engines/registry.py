@@ -0,0 +1,128 @@
+import importlib
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+
+from loguru import logger
+
+from .base_engine import BaseEngine
+
+ENTRY_POINT_GROUP = "piece_of_code.engines"
+
+
+@dataclass(frozen=True, slots=True)
+class ImportTiming:
+    """How long loading an engine took and how many new modules it pulled in."""
+
+    name: str
+    seconds: float
+    new_modules: int
+
+
+class EngineRegistry:
+    """
+    Maps engine names to engine classes that are imported on first use.
+
+    Engines are registered as "module:ClassName" targets, so selecting one
+    engine never imports the others. Engines are stateless, so one instance
+    per engine is created and shared by every session in the process.
+    """
+
+    def __init__(self, targets: dict[str, str] | None = None):
+        self._targets: dict[str, str] = dict(targets or {})
+        self._instances: dict[str, BaseEngine] = {}
+        self._timings: dict[str, ImportTiming] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: str) -> None:
+        """
+        Registers an engine.
+
+        Args:
+            name (str): Display name of the engine.
+            target (str): Import target in "package.module:ClassName" form.
+        """
+        with self._lock:
+            self._targets[name] = target
+            self._instances.pop(name, None)
+
+    def load_plugins(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """Registers third-party engines advertised through package entry points."""
+        for ep in entry_points(group=group):
+            self.register(ep.name, ep.value)
+
+    def names(self) -> list[str]:
+        """Returns the registered engine names in registration order."""
+        with self._lock:
+            return list(self._targets)
+
+    def loaded(self) -> list[str]:
+        """Returns the names of the engines imported so far."""
+        with self._lock:
+            return [name for name in self._targets if name in self._instances]
+
+    def target(self, name: str) -> str:
+        """Returns the "module:ClassName" import target registered for name."""
+        with self._lock:
+            return self._targets[name]
+
+    def get(self, name: str) -> BaseEngine:
+        """
+        Returns the shared engine instance for name, importing it if needed.
+
+        Args:
+            name (str): The registered engine name.
+
+        Returns:
+            BaseEngine: The engine instance.
+
+        Raises:
+            KeyError: If no engine is registered under name.
+        """
+        with self._lock:
+            engine = self._instances.get(name)
+            if engine is None:
+                engine = self._load(name)
+                self._instances[name] = engine
+            return engine
+
+    def import_report(self) -> list[ImportTiming]:
+        """Returns the import cost of every engine loaded so far, slowest first."""
+        with self._lock:
+            return sorted(self._timings.values(), key=lambda t: -t.seconds)
+
+    def _load(self, name: str) -> BaseEngine:
+        module_name, _, class_name = self._targets[name].partition(":")
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+
+        engine_cls = getattr(importlib.import_module(module_name), class_name)
+        engine = engine_cls()
+
+        timing = ImportTiming(
+            name=str(name),
+            seconds=time.perf_counter() - start,
+            new_modules=len(sys.modules) - modules_before,
+        )
+        self._timings[name] = timing
+        logger.info(
+            "Loaded engine '{}' in {:.3f}s ({} new modules)",
+            name,
+            timing.seconds,
+            timing.new_modules,
+        )
+        return engine
+
+
+def format_import_report(registry: EngineRegistry) -> str:
+    """Loads every registered engine in turn and tabulates what each one adds."""
+    for name in registry.names():
+        registry.get(name)
+    rows = [f"{'Engine':<24} {'Seconds':>8} {'Modules':>8}"]
+    rows += [
+        f"{t.name:<24} {t.seconds:>8.3f} {t.new_modules:>8}"
+        for t in registry.import_report()
+    ]
+    return "\n".join(rows)
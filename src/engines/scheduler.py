@@ -0,0 +1,163 @@
+import contextlib
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+
+from loguru import logger
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from settings import settings
+
+from .metrics import record
+
+WAIT_POLL_INTERVAL = 0.5  # seconds between queue position updates
+
+
+class SchedulerFullError(Exception):
+    """Raised when a run can't be queued because the queue is full."""
+
+
+@dataclass(eq=False, slots=True)
+class _Waiter:
+    session: str
+
+
+class RunScheduler:
+    """
+    Admission control for engine runs across sessions.
+
+    At most `max_running` runs execute at once. Runs that can't start wait in
+    a FIFO queue of their session, and queues are served round-robin, so a
+    session rerunning heavily can't starve the others. Once `max_queued` runs
+    wait, further runs are refused instead of piling up.
+    """
+
+    def __init__(self, max_running: int | None, max_queued: int):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self._running = 0
+        # Insertion order is the round-robin order: a session moves to the
+        # back whenever one of its runs leaves the queue.
+        self._queues: dict[str, deque[_Waiter]] = {}
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def admit(
+        self,
+        session: str | None = None,
+        on_wait: Callable[[int], None] | None = None,
+    ) -> Iterator[None]:
+        """
+        Holds a run slot for the duration of the block, waiting for one first
+        if all are taken. While waiting, on_wait is called with the run's
+        1-based queue position every WAIT_POLL_INTERVAL seconds; an exception
+        it raises (e.g. Streamlit stopping the script for a newer rerun)
+        gives up the place in the queue.
+
+        Args:
+            session (str | None): Fair-share key; the current Streamlit
+                session's id if None.
+            on_wait (Callable[[int], None] | None): Reports the position.
+
+        Raises:
+            SchedulerFullError: If `max_queued` runs are already waiting.
+        """
+        if session is None:
+            ctx = get_script_run_ctx(suppress_warning=True)
+            session = ctx.session_id if ctx is not None else ""
+
+        waiter = _Waiter(session)
+        waited = False
+        start = time.perf_counter()
+        with self._cond:
+            can_start_now = not self._queues and self._slot_free()
+            if self._queued() >= self.max_queued and not can_start_now:
+                logger.bind(queue_depth=self._queued(), running=self._running).warning(
+                    "scheduler.reject: queue full"
+                )
+                raise SchedulerFullError(f"{self._queued()} runs are already queued.")
+            self._queues.setdefault(session, deque()).append(waiter)
+
+        try:
+            while True:
+                with self._cond:
+                    if self._can_start(waiter):
+                        self._dequeue(waiter)
+                        self._running += 1
+                        depth = self._queued()
+                        break
+                    position = self._position(waiter)
+                    if not waited:
+                        logger.bind(
+                            session=session,
+                            queue_depth=self._queued(),
+                            running=self._running,
+                        ).info("scheduler.enqueue: queued at position {}", position)
+                waited = True
+                if on_wait is not None:
+                    on_wait(position)
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: self._can_start(waiter), timeout=WAIT_POLL_INTERVAL
+                    )
+        except BaseException:
+            with self._cond:
+                self._dequeue(waiter)
+                self._cond.notify_all()
+            raise
+
+        wait_ms = (time.perf_counter() - start) * 1e3
+        record(queue_wait_ms=wait_ms)
+        if waited:
+            logger.bind(session=session, wait_ms=wait_ms, queue_depth=depth).info(
+                "scheduler.admit: waited {:,.1f} ms, {} still queued", wait_ms, depth
+            )
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> dict[str, int]:
+        """Returns the number of running and queued runs."""
+        with self._cond:
+            return {"running": self._running, "queued": self._queued()}
+
+    def _slot_free(self) -> bool:
+        return self.max_running is None or self._running < self.max_running
+
+    def _can_start(self, waiter: _Waiter) -> bool:
+        if not self._slot_free():
+            return False
+        head = next(iter(self._queues.values()))
+        return head[0] is waiter
+
+    def _queued(self) -> int:
+        return sum(map(len, self._queues.values()))
+
+    def _position(self, waiter: _Waiter) -> int:
+        # Round-robin order: every session's first run, then every second...
+        queues = list(self._queues.values())
+        position = 0
+        for depth in range(max(map(len, queues))):
+            for queue in queues:
+                if depth < len(queue):
+                    position += 1
+                    if queue[depth] is waiter:
+                        return position
+        raise ValueError("waiter is not queued")
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        queue = self._queues.pop(waiter.session)
+        queue.remove(waiter)
+        if queue:
+            self._queues[waiter.session] = queue
+
+
+RUN_SCHEDULER = RunScheduler(
+    max_running=settings.scheduler_max_running,
+    max_queued=settings.scheduler_max_queued,
+)
@@ -2,7 +2,6 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from typing import Any
 
-import requests
 import streamlit as st
 
 HN_API = "https://hacker-news.firebaseio.com/v0"
@@ -19,7 +18,7 @@ HN_DISCUSS_URL = "https://news.ycombinator.com/item?id={id}"
 @st.cache_data(show_spinner=False, ttl=60)
 def get_top_story_ids(limit: int = 100) -> list[int]:
     """Fetch top story IDs from the official Hacker News Firebase API."""
-    resp = requests.get(TOP_STORIES_URL, timeout=20)
+    resp = http_client.get(TOP_STORIES_URL, timeout=20)  # noqa: F821
     resp.raise_for_status()
     ids = resp.json() or []
     return ids[:limit]
@@ -28,7 +27,7 @@ def get_top_story_ids(limit: int = 100) -> list[int]:
 @st.cache_data(show_spinner=False, ttl=300)
 def get_item(item_id: int) -> dict[str, Any]:
     """Fetch a single HN item (story) by ID."""
-    r = requests.get(ITEM_URL.format(id=item_id), timeout=20)
+    r = http_client.get(ITEM_URL.format(id=item_id), timeout=20)  # noqa: F821
     r.raise_for_status()
     return r.json() or {}
 
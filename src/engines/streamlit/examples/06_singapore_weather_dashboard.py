@@ -1,7 +1,6 @@
 from datetime import datetime
 
 import pandas as pd
-import requests
 import streamlit as st
 
 st.title("🌦️ Singapore 2-Hour Weather Forecast")
@@ -11,7 +10,7 @@ st.title("🌦️ Singapore 2-Hour Weather Forecast")
 def get_weather_data():
     url = "https://api-open.data.gov.sg/v2/real-time/api/two-hr-forecast"
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, timeout=10)  # noqa: F821
         response.raise_for_status()
         return response.json()
     except Exception as e:
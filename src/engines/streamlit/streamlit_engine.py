@@ -1,8 +1,30 @@
+import ast
 from pathlib import Path
 
 import streamlit as st
 
-from ..python_base_engine import PythonBaseEngine
+from settings import settings
+
+from ..cache import LRUCache
+from ..console import ConsoleLog
+from ..python_base_engine import COMPILE_CACHE_SIZE, PythonBaseEngine
+
+# Whether a snippet writes to the sidebar, keyed by (engine type, source hash).
+SIDEBAR_CACHE: LRUCache[tuple[str, str], bool] = LRUCache(maxsize=COMPILE_CACHE_SIZE)
+
+
+def uses_sidebar(code: str) -> bool:
+    """Returns whether code refers to `st.sidebar` (or imports `sidebar`)."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr == "sidebar":
+            return True
+        if isinstance(node, ast.alias) and node.name == "sidebar":
+            return True
+    return False
 
 
 class StreamlitEngine(PythonBaseEngine):
@@ -10,14 +32,24 @@ class StreamlitEngine(PythonBaseEngine):
 
     def get_execution_globals(self) -> dict:
         """Inject Streamlit API into execution environment."""
-        return {"__name__": "__main__", "st": st}
+        return {**super().get_execution_globals(), "st": st}
+
+    def reruns_in_fragment(self, code: str) -> bool:
+        """
+        Scope widget reruns to the preview, unless the snippet writes to the
+        sidebar, which Streamlit doesn't allow from inside a fragment.
+        """
+        if not settings.fragment_reruns:
+            return False
+        return not SIDEBAR_CACHE.get_or_set(
+            self.cache_key(code), lambda: uses_sidebar(code)
+        )
 
-    def show_console_output(self, console: str) -> None:
+    def show_console_output(self, console: ConsoleLog, live: bool = False) -> None:
         """Display console output in an expander if present."""
-        console = console.strip()
-        if console:
+        if console.size:
             with st.expander("Console output"):
-                st.code(console, language="text")
+                super().show_console_output(console, live=live)
 
     def list_examples(self) -> list[Path]:
         """Lists available example files for this engine."""
@@ -0,0 +1,45 @@
+import streamlit as st
+
+from settings import settings
+
+from .display import TableOutput
+
+
+@st.fragment
+def show_table(output: TableOutput) -> None:
+    """
+    Renders a displayed table one page at a time.
+
+    Sorting and slicing happen on the Arrow table on the server, so only the
+    visible page is serialized and sent to the browser. Runs as a fragment,
+    so paging and sorting don't re-run the snippet.
+
+    Args:
+        output (TableOutput): The table to show.
+    """
+    table = output.table
+    page_rows = settings.display_page_rows
+    pages = max(-(-table.num_rows // page_rows), 1)
+    key = f"table-{output.id}"
+
+    if pages > 1:
+        sort_col, order_col, page_col = st.columns([3, 2, 2])
+        sort_by = sort_col.selectbox(
+            "Sort by",
+            table.column_names,
+            index=None,
+            placeholder="Original order",
+            key=f"{key}-sort",
+        )
+        descending = order_col.toggle("Descending", key=f"{key}-descending")
+        page = page_col.number_input(
+            f"Page (of {pages:,})", min_value=1, max_value=pages, key=f"{key}-page"
+        )
+        if sort_by is not None:
+            table = table.sort_by(
+                [(sort_by, "descending" if descending else "ascending")]
+            )
+        table = table.slice((page - 1) * page_rows, page_rows)
+
+    st.dataframe(table)
+    st.caption(f"{output.table.num_rows:,} rows × {output.table.num_columns:,} columns")
@@ -0,0 +1,15 @@
+from settings import settings
+
+from .cache import LRUCache
+
+WARM_CACHE_SIZE = 256
+
+# Results of bundled examples pre-rendered by the background warm-up (see
+# src/warmup.py), keyed by BaseEngine.cache_key(): a CapturedRun for Python
+# snippets and the final HTML document for HTML and React ones. Python
+# entries are dropped once the code runs for real, and all entries expire
+# after `APP_WARMUP_TTL`, so examples that fetch live data aren't replayed
+# from the warm-up forever.
+WARM_CACHE: LRUCache[tuple[str, str], object] = LRUCache(
+    maxsize=WARM_CACHE_SIZE, ttl=settings.warmup_ttl
+)
@@ -1,16 +1,38 @@
+import contextlib
+from collections.abc import Callable
+from dataclasses import replace
+
 import streamlit as st
 from code_editor import code_editor
+from streamlit.delta_generator import DeltaGenerator
 
+from api import start_api_server
+from catalog import EXAMPLE_CATALOG
 from config import (
     CODE_PREVIEW_THRESHOLD,
     CODE_PREVIEW_WIDTH,
-    ENGINE_MAPPING,
+    EDITOR_SETTINGS,
+    ENGINE_REGISTRY,
     PYTHON_EDITOR_SETTINGS,
     TITLE,
-    Engine,
     OutputLayout,
+    with_auto_run,
+)
+from engines import BaseEngine, RunOptions
+from engines.cancellation import cancel_on_rerun
+from engines.cells import CELL_STATE_KEY
+from engines.metrics import track_run
+from engines.scheduler import RUN_SCHEDULER, SchedulerFullError
+from snippet_store import (
+    SnippetTooLargeError,
+    StoredSnippet,
+    get_snippet_store,
+    share_snippet,
 )
-from engines import BaseEngine
+from warmup import start_warmup
+
+PERMALINK_PARAM = "snippet"
+PENDING_RUN_KEY = "pending_run"  # RunOptions for the next full-app run only
 
 st.set_page_config(
     page_title=TITLE, page_icon="⚡️", layout="wide", initial_sidebar_state="expanded"
@@ -24,6 +46,51 @@ if "output_layout" not in st.session_state:
 def reset_code_selection():
     if "example_selector" in st.session_state and st.session_state.example_selector:
         st.session_state.example_selector = None
+    close_permalink()
+
+
+def open_permalink():
+    """
+    Opens the snippet in the page's ?snippet= permalink, once per link: its
+    engine is selected, and its stored output is kept in the session for the
+    first run to show. Must be called before the engine selectbox is created.
+    """
+    snippet_id = st.query_params.get(PERMALINK_PARAM)
+    current = st.session_state.get("permalink")
+    if not snippet_id or (current is not None and current.id == snippet_id):
+        return
+
+    snippet = get_snippet_store().get(snippet_id)
+    if snippet is None or snippet.engine not in ENGINE_REGISTRY.names():
+        st.session_state.permalink = None
+        st.toast(f"Snippet {snippet_id} not found.", icon="⚠️")
+        return
+    st.session_state.permalink = snippet
+    st.session_state.app_engine = snippet.engine
+    st.session_state.example_selector = None
+    st.session_state.permalink_output = get_snippet_store().output(snippet.id)
+
+
+def close_permalink():
+    st.session_state.permalink = None
+    st.session_state.pop("permalink_output", None)
+    st.query_params.pop(PERMALINK_PARAM, None)
+
+
+def take_permalink_output(code: str) -> bytes | None:
+    """
+    Returns the stored output of the opened permalink, once: only the first
+    run after opening it shows the output, and only if code is unchanged.
+    """
+    output = st.session_state.pop("permalink_output", None)
+    permalink = st.session_state.get("permalink")
+    if permalink is None or permalink.code != code:
+        return None
+    return output
+
+
+def reset_cell_state():
+    st.session_state.pop(CELL_STATE_KEY, None)
 
 
 def get_panels():
@@ -58,35 +125,65 @@ def get_panels():
 
 def get_code(app_engine: BaseEngine) -> str:
     """
-    Loads code from selected example file.
+    Loads code from selected example file, or else from the opened permalink.
 
     Args:
         app_engine: The engine instance to get examples from.
 
     Returns:
-        str: The code content from the selected example, or empty string.
+        str: The code content from the selected example or shared snippet,
+            or empty string.
     """
     code = ""
+    permalink = st.session_state.get("permalink")
+    if permalink is not None and permalink.engine == st.session_state.app_engine:
+        code = permalink.code
 
     try:
-        examples = sorted(app_engine.list_examples())
+        examples = EXAMPLE_CATALOG.examples(app_engine)
 
         if examples:
             selected_ex = st.selectbox(
                 "Examples",
-                examples,
+                list(examples),
                 placeholder="Select an example...",
-                format_func=lambda f: f.stem.title().replace("_", " "),
+                format_func=lambda key: examples[key].name,
                 key="example_selector",
+                on_change=close_permalink,
             )
-            if selected_ex:
-                code = selected_ex.read_text()
+            if selected_ex in examples:
+                code = examples[selected_ex].code
     except Exception as e:
         st.error(f"Error loading examples: {e}")
 
     return code
 
 
+def get_run_request(editor_output: dict) -> str | None:
+    """
+    Checks whether the editor output comes from a new Run or Profile press,
+    or from a debounced edit while auto-run is on.
+
+    The editor keeps returning its last response on every rerun, so a press
+    is only new if its response id hasn't been seen in this session yet.
+
+    Args:
+        editor_output: The response dict returned by the code editor.
+
+    Returns:
+        str | None: "submit", "profile", "share" or "change" for a new
+            response, otherwise None.
+    """
+    response_id = editor_output.get("id")
+    response_type = editor_output.get("type")
+    if response_type not in ("submit", "profile", "share", "change") or not response_id:
+        return None
+    if st.session_state.get("last_run_id") == response_id:
+        return None
+    st.session_state.last_run_id = response_id
+    return response_type
+
+
 def get_settings():
     """
     Configures sidebar settings and initializes the selected engine.
@@ -95,17 +192,29 @@ def get_settings():
         tuple: (app_engine, code_panel, preview_panel, code) or None on error.
     """
     try:
+        open_permalink()
         with st.sidebar:
             st.selectbox(
                 "Engine",
-                options=Engine,
+                options=ENGINE_REGISTRY.names(),
                 key="app_engine",
                 on_change=reset_code_selection,
             )
-            app_engine = ENGINE_MAPPING[st.session_state.app_engine]()
+            app_engine = ENGINE_REGISTRY.get(st.session_state.app_engine)
 
             code = get_code(app_engine)
 
+            if app_engine.supports_cells:
+                st.toggle(
+                    "Cell Mode",
+                    key="cell_mode",
+                    on_change=reset_cell_state,
+                    help="Split code on `# %%` and re-run only changed cells "
+                    "and the cells that depend on them.",
+                )
+                if st.session_state.cell_mode:
+                    st.button("Restart Cells", on_click=reset_cell_state)
+
             st.slider(
                 "Resize Panels",
                 min_value=int(CODE_PREVIEW_THRESHOLD * CODE_PREVIEW_WIDTH),
@@ -115,6 +224,12 @@ def get_settings():
                 format="",
             )
             st.toggle("Swap Panels", key="swap_panels")
+            st.toggle(
+                "Auto-run",
+                key="auto_run",
+                help="Re-run the code after a pause in typing, abandoning any "
+                "run that is still in progress.",
+            )
 
         code_panel, preview_panel = get_panels()
         return app_engine, code_panel, preview_panel, code
@@ -123,8 +238,81 @@ def get_settings():
         return None
 
 
+def share_code(app_engine: BaseEngine, code: str) -> str | None:
+    """Saves code to the snippet store and opens its permalink."""
+    try:
+        snippet_id = share_snippet(st.session_state.app_engine, app_engine, code)
+    except SnippetTooLargeError as e:
+        st.error(str(e))
+        return None
+    st.session_state.permalink = StoredSnippet(
+        id=snippet_id, engine=st.session_state.app_engine, code=code
+    )
+    st.query_params[PERMALINK_PARAM] = snippet_id
+    return snippet_id
+
+
+def show_permalink(snippet_id: str | None) -> None:
+    if snippet_id is not None:
+        st.success(
+            f"Shared as `?{PERMALINK_PARAM}={snippet_id}`: "
+            "this page's URL now opens the snippet and its output.",
+            icon="🔗",
+        )
+
+
+def show_queue_position(status: DeltaGenerator) -> Callable[[int], None]:
+    """Returns a callback that shows a waiting run's queue position in status."""
+
+    def show(position: int) -> None:
+        status.info(
+            f"Waiting for a free slot: position {position} in the queue.", icon="⏳"
+        )
+
+    return show
+
+
+def run_preview(app_engine: BaseEngine, code: str, cells: bool) -> None:
+    """
+    Runs code in a new preview container, under admission control, and shows
+    the run's metrics below it.
+
+    The one-shot flags of a Run or Profile press or an opened permalink are
+    taken from the session, once: as a fragment, this function is called
+    again with the same arguments on every widget interaction.
+    """
+    preview_container = st.container(border=True, height="stretch")
+    pending = st.session_state.pop(PENDING_RUN_KEY, None) or RunOptions()
+    if not code:
+        return
+    options = replace(pending, cells=cells)
+
+    cancellation = (
+        cancel_on_rerun() if st.session_state.auto_run else contextlib.nullcontext()
+    )
+    status = preview_container.empty()
+    try:
+        with (
+            track_run(st.session_state.app_engine) as metrics,
+            cancellation,
+            RUN_SCHEDULER.admit(on_wait=show_queue_position(status)),
+        ):
+            status.empty()
+            app_engine.run(code, preview_container, options)
+    except SchedulerFullError:
+        status.warning(
+            "The server is busy running other sessions' code. "
+            "Please try again in a moment.",
+            icon="🚦",
+        )
+    else:
+        st.caption(metrics.summary())
+
+
 def main():
     """Main application entry point."""
+    start_warmup()  # once per process; later calls return immediately
+    start_api_server()  # likewise
     st.title(TITLE)
 
     settings = get_settings()
@@ -140,18 +328,38 @@ def main():
 
             code_panel = st.container(border=True)
             with code_panel:
+                editor_settings = (
+                    PYTHON_EDITOR_SETTINGS
+                    if app_engine.language == "python"
+                    else EDITOR_SETTINGS
+                )
+                if st.session_state.auto_run:
+                    editor_settings = with_auto_run(editor_settings)
                 editor_output = code_editor(
-                    lang=app_engine.language, code=code, **PYTHON_EDITOR_SETTINGS
+                    lang=app_engine.language, code=code, **editor_settings
                 )
                 code = editor_output["text"]
+                run_request = get_run_request(editor_output)
+            if run_request == "share" and code:
+                show_permalink(share_code(app_engine, code))
 
         with preview_panel:
             if st.session_state.output_layout == OutputLayout.SIDE_BY_SIDE:
                 st.write("Preview")
 
-            preview_container = st.container(border=True, height="stretch")
-            if code:
-                app_engine.run(code, preview_container)
+            output = take_permalink_output(code)
+            st.session_state[PENDING_RUN_KEY] = RunOptions(
+                force=run_request in ("submit", "profile"),
+                profile=run_request == "profile",
+                output=output if run_request is None else None,
+            )
+            # A fragment's widgets rerun only the fragment, not the whole app.
+            preview = (
+                st.fragment(run_preview)
+                if code and app_engine.reruns_in_fragment(code)
+                else run_preview
+            )
+            preview(app_engine, code, st.session_state.get("cell_mode", False))
     except Exception as e:
         st.error(f"Unexpected error: {e}")
         st.exception(e)
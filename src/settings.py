@@ -0,0 +1,95 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    Runtime settings, read from `APP_*` environment variables or a `.env` file.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=".env", env_prefix="APP_", extra="ignore", env_parse_none_str="none"
+    )
+
+    host: str = "localhost"
+    port: int = 8501
+
+    # Python engine execution backend
+    python_backend: Literal["in-process", "worker-pool"] = "in-process"
+    worker_pool_size: int = 2
+    worker_timeout: float = 30.0  # seconds of wall-clock time per run
+    worker_max_runs: int = 50  # runs before a worker is recycled
+    worker_preload: list[str] = ["pandas", "numpy", "httpx"]
+
+    # Console output streaming for Python and Streamlit engines
+    console_streaming: bool = True
+    console_flush_interval: float = 0.25  # seconds between live updates
+    console_flush_bytes: int = 8192  # pending characters that force an update
+    console_tail_chars: int = 20_000  # characters shown while a snippet runs
+    console_memory_bytes: int = 1 << 20  # output kept in memory before spilling to disk
+    console_page_bytes: int = 16_384  # size of the head, tail and pages in the viewer
+
+    # Per-run limits for Python and Streamlit snippets; `none` disables a limit
+    budget_wall_time: float | None = 30.0  # seconds
+    # Lines executed in the snippet itself. Counted with sys.settrace, which
+    # makes the snippet's own code 3-13x slower (make bench-budgets), so this
+    # limit is off unless set.
+    budget_line_events: int | None = None
+    budget_output_chars: int | None = 50_000_000
+
+    # Admission control for engine runs across sessions; `none` disables the cap
+    scheduler_max_running: int | None = 8  # runs executing at once
+    scheduler_max_queued: int = 100  # runs waiting before new ones are refused
+
+    # Idle time after the last keystroke before auto-run re-runs the code
+    auto_run_delay_ms: int = 800
+
+    # Let widgets in Streamlit snippets rerun only the preview (st.fragment)
+    fragment_reruns: bool = True
+
+    # Serve HTML/React previews from content-hash URLs instead of inlining them
+    preview_server: bool = False
+    preview_port: int = 8503
+    preview_url: str | None = None  # public base URL, if not http://<host>:<port>
+
+    # Local HTTP API for running snippets without the UI (see src/api.py)
+    api_server: bool = False
+    api_port: int = 8504
+    api_workers: int = 2  # snippets executed concurrently
+    api_queue_size: int = 32  # jobs waiting for a worker before requests get 503
+
+    # Rows per page of DataFrames shown with display() in the Python engine
+    display_page_rows: int = 100
+
+    # Shared HTTP clients injected into Python and Streamlit snippets
+    http_cache: bool = True  # RFC 9111 response cache on disk
+    http_cache_dir: str | None = None  # <temp dir>/piece-of-code-http-cache if unset
+    http_cache_max_bytes: int = 128 * 1024 * 1024
+    http_max_connections: int = 100
+    http_max_connections_per_host: int = 6
+
+    # SQLite database of snippets shared through ?snippet= permalinks
+    snippet_db: str = "snippets.db"
+
+    # Opt-in replay of Python engine results for unchanged code
+    result_cache: bool = False
+    result_cache_ttl: float = 600.0  # seconds
+    result_cache_max_bytes: int = 32 * 1024 * 1024
+
+    # Also record allocation sites (tracemalloc) when profiling a run
+    profile_memory: bool = True
+
+    # Also watch example directories for in-place edits (mtime checks always run)
+    catalog_watch: bool = True
+
+    # Pre-render bundled examples in the background at startup
+    warmup: bool = True
+    warmup_interval: float = 10.0  # seconds between checks for changed examples
+    warmup_ttl: float = 600.0  # seconds a pre-rendered result is replayed
+
+    # Server-side TSX transpilation for the React engine (esbuild on PATH if unset)
+    esbuild_path: str | None = None
+
+
+settings = Settings()
@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from engines import BaseEngine
+from settings import settings
+
+SNIPPET_ID_LENGTH = 12  # hex digits of the permalink id
+MAX_SOURCE_BYTES = 1024 * 1024
+MAX_OUTPUT_BYTES = 4 * 1024 * 1024  # larger outputs aren't stored
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snippets (
+    id TEXT PRIMARY KEY,
+    engine TEXT NOT NULL,
+    source BLOB NOT NULL,
+    created REAL NOT NULL,
+    opened INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    id TEXT PRIMARY KEY REFERENCES snippets (id) ON DELETE CASCADE,
+    output BLOB NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+class SnippetTooLargeError(ValueError):
+    """Raised when a snippet's source exceeds MAX_SOURCE_BYTES."""
+
+
+@dataclass(frozen=True, slots=True)
+class StoredSnippet:
+    """A shared snippet and the engine it was shared from."""
+
+    id: str
+    engine: str  # registered engine name
+    code: str
+
+
+def snippet_id(engine: BaseEngine, code: str) -> str:
+    """Returns the permalink id of code on engine, derived from its cache key."""
+    engine_type, digest = engine.cache_key(code)
+    return hashlib.sha256(f"{engine_type}:{digest}".encode()).hexdigest()[
+        :SNIPPET_ID_LENGTH
+    ]
+
+
+class SnippetStore:
+    """
+    Persistent, content-addressed store of shared snippets in SQLite.
+
+    A snippet's id is derived from its engine and source hash, so saving the
+    same code on the same engine again yields the same permalink and row.
+    Sources are stored gzip-compressed, together with the latest output the
+    engine exported for them, so that opening a shared snippet can replay
+    that output instead of executing the code.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def save(
+        self,
+        engine_name: str,
+        engine: BaseEngine,
+        code: str,
+        output: bytes | None = None,
+    ) -> str:
+        """
+        Stores a snippet, and its output if given, replacing the output
+        stored before.
+
+        Args:
+            engine_name (str): Registered name of the engine.
+            engine (BaseEngine): The engine instance.
+            code (str): The snippet's source.
+            output (bytes | None): Output from engine.export_output(); not
+                stored if larger than MAX_OUTPUT_BYTES.
+
+        Returns:
+            str: The snippet's permalink id.
+
+        Raises:
+            SnippetTooLargeError: If code exceeds MAX_SOURCE_BYTES.
+        """
+        source = code.encode()
+        if len(source) > MAX_SOURCE_BYTES:
+            raise SnippetTooLargeError(
+                f"Snippets are limited to {MAX_SOURCE_BYTES:,} bytes."
+            )
+        id = snippet_id(engine, code)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO snippets (id, engine, source, created) "
+                "VALUES (?, ?, ?, ?)",
+                (id, str(engine_name), gzip.compress(source, mtime=0), time.time()),
+            )
+            if output is not None and len(output) <= MAX_OUTPUT_BYTES:
+                self._put_output(id, output)
+        return id
+
+    def get(self, id: str) -> StoredSnippet | None:
+        """Returns a snippet by permalink id, counting the open."""
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT engine, source FROM snippets WHERE id = ?", (id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE snippets SET opened = opened + 1 WHERE id = ?", (id,)
+            )
+        engine, source = row
+        return StoredSnippet(
+            id=id, engine=engine, code=gzip.decompress(source).decode()
+        )
+
+    def output(self, id: str) -> bytes | None:
+        """Returns the latest output stored for a snippet, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT output FROM outputs WHERE id = ?", (id,)
+            ).fetchone()
+        return gzip.decompress(row[0]) if row else None
+
+    def _put_output(self, id: str, output: bytes) -> None:
+        # Caller holds the lock and a transaction.
+        self._db.execute(
+            "INSERT OR REPLACE INTO outputs (id, output, updated) VALUES (?, ?, ?)",
+            (id, gzip.compress(output, mtime=0), time.time()),
+        )
+
+
+def share_snippet(engine_name: str, engine: BaseEngine, code: str) -> str:
+    """
+    Saves code to the snippet store with the output of the session's latest
+    run of it, if the engine can export one of at most MAX_OUTPUT_BYTES.
+    Nothing is executed: code shared without output runs when its link is
+    opened.
+
+    Args:
+        engine_name (str): Registered name of the engine.
+        engine (BaseEngine): The engine instance.
+        code (str): The snippet's source.
+
+    Returns:
+        str: The snippet's permalink id.
+    """
+    try:
+        output = engine.export_output(code, max_bytes=MAX_OUTPUT_BYTES)
+    except Exception as e:
+        logger.warning("Could not export the output of a shared snippet: {}", e)
+        output = None
+    return get_snippet_store().save(engine_name, engine, code, output)
+
+
+_snippet_store: SnippetStore | None = None
+_snippet_store_lock = threading.Lock()
+
+
+def get_snippet_store() -> SnippetStore:
+    """Returns the process-wide snippet store, opening it on first use."""
+    global _snippet_store
+    with _snippet_store_lock:
+        if _snippet_store is None:
+            _snippet_store = SnippetStore(Path(settings.snippet_db))
+        return _snippet_store
@@ -0,0 +1,112 @@
+import threading
+import time
+
+from loguru import logger
+
+from catalog import EXAMPLE_CATALOG, ExampleCatalog
+from config import ENGINE_REGISTRY
+from engines import EngineRegistry
+from engines.warm_cache import WARM_CACHE
+from settings import settings
+
+
+class ExampleWarmer:
+    """
+    Pre-renders the bundled examples of the default engine, and of any other
+    loaded engine, in a background thread.
+
+    Each example is handed to its engine's prerender(), which stores the
+    result in the warm cache under the example's source hash, so the first
+    session to select an unmodified example doesn't pay for running it. The
+    default engine (the first registered, which new sessions open with) is
+    loaded for this; the others are never imported for it, and their
+    examples are pre-rendered once a session has selected them. The catalog
+    and registry are re-checked every `interval` seconds and only examples
+    whose hash is new are pre-rendered again; entries of examples that were
+    edited or removed are dropped.
+    """
+
+    def __init__(
+        self, registry: EngineRegistry, catalog: ExampleCatalog, interval: float
+    ):
+        self._registry = registry
+        self._catalog = catalog
+        self._interval = interval
+        self._warm: set[tuple[str, str]] = set()  # cache keys of current examples
+        self._state: tuple[int, int] | None = None  # catalog version, engines
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Starts the warm-up thread unless it is already running."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="example-warmup", daemon=True
+                )
+                self._thread.start()
+
+    def warm(self) -> int:
+        """
+        Pre-renders the examples that changed since the last call.
+
+        Returns:
+            int: Number of examples stored in the warm cache.
+        """
+        default = self._registry.names()[:1]
+        engines = list(dict.fromkeys([*default, *self._registry.loaded()]))
+        examples = [
+            (engine, example)
+            for engine in map(self._registry.get, engines)
+            for example in self._catalog.examples(engine).values()
+        ]
+        # Reading every index above refreshes any that went stale.
+        state = (self._catalog.version, len(engines))
+        if state == self._state:
+            return 0
+        self._state = state
+
+        current = {engine.cache_key(example.code) for engine, example in examples}
+        for key in self._warm - current:
+            WARM_CACHE.pop(key)
+        self._warm &= current
+
+        warmed = 0
+        for engine, example in examples:
+            key = engine.cache_key(example.code)
+            if key in self._warm:
+                continue
+            try:
+                if engine.prerender(example.code):
+                    self._warm.add(key)
+                    warmed += 1
+            except Exception as e:
+                logger.warning("Could not pre-render example {}: {}", example.key, e)
+        return warmed
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                warmed = self.warm()
+                if warmed:
+                    logger.info("Pre-rendered {} examples", warmed)
+            except Exception as e:
+                logger.warning("Example warm-up failed: {}", e)
+            time.sleep(self._interval)
+
+
+EXAMPLE_WARMER = ExampleWarmer(
+    ENGINE_REGISTRY, EXAMPLE_CATALOG, interval=settings.warmup_interval
+)
+
+
+def start_warmup() -> None:
+    """
+    Starts pre-rendering examples in the background if `APP_WARMUP` is on.
+
+    Streamlit has no hook for server start-up, so the app calls this on each
+    script run and the warm-up starts with the first session. That session
+    may still run its first example cold, before the warm-up reaches it.
+    """
+    if settings.warmup:
+        EXAMPLE_WARMER.start()